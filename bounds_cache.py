@@ -0,0 +1,220 @@
+### On-disk cache of detected content bounds, so re-running pdf_margin.py on the same file skips detection ###
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+import zlib
+
+# References to other objects in PDF object source, e.g. "12 0 R"
+_REFERENCE = re.compile(rb"(\d+) (\d+) R")
+
+class BoundsCache:
+    """
+    Persistent cache of content bounds and ink profiles, with LRU eviction.
+
+    Entries are keyed by a hash of everything that decides what a page looks like when
+    rendered: its content streams, resources (fonts, images, forms...), the appearance
+    streams of its annotations, size and rotation, plus the render DPI and ink threshold.
+    Object numbers are left out of the hash, so the same page in a re-saved or merged
+    file still hits, and links to other pages are not followed.
+
+    The cache is one SQLite file, safe to share between worker processes. When it
+    grows past max_bytes the least recently used entries are removed.
+
+    Args:
+        path (str): Cache file path
+        max_bytes (int): Size cap of the stored entries (default: 64 MB)
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._object_digests = {}
+        self._object_nodes = {}
+        self._page_xrefs = None
+        self._digest_doc = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS bounds ("
+            "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS bounds_last_used ON bounds (last_used)")
+        self.connection.commit()
+
+    def page_key(self, page, dpi, threshold):
+        """
+        Cache key of a page rendered at dpi and scanned with threshold.
+
+        Args:
+            page: PyMuPDF page
+            dpi (int): Render resolution
+            threshold (int): Ink threshold
+
+        Returns:
+            str: Hex digest
+        """
+        doc = page.parent
+        if doc is not self._digest_doc:
+            # Object digests are only valid within one open document
+            self._object_digests = {}
+            self._object_nodes = {}
+            self._page_xrefs = None
+            self._digest_doc = doc
+
+        key = hashlib.sha256()
+        key.update(f"{tuple(page.rect)}|{page.rotation}|{dpi}|{threshold}|".encode())
+        for contents_xref in page.get_contents():
+            key.update(self._object_digest(doc, contents_xref))
+        key.update(b"|")
+
+        # Resources can be inherited from the page tree
+        resources = doc.xref_get_key(page.xref, "Resources")
+        parent = doc.xref_get_key(page.xref, "Parent")
+        while resources[0] == "null" and parent[0] == "xref":
+            parent_xref = int(parent[1].split()[0])
+            resources = doc.xref_get_key(parent_xref, "Resources")
+            parent = doc.xref_get_key(parent_xref, "Parent")
+        key.update(self._value_digest(doc, resources))
+
+        # Annotations render through their appearance streams
+        for annot_xref, _, _ in page.annot_xrefs():
+            for name in ("Rect", "F", "AS", "AP"):
+                key.update(self._value_digest(doc, doc.xref_get_key(annot_xref, name)))
+        return key.hexdigest()
+
+    def get(self, key):
+        """
+        Look up bounds.
+
+        Returns:
+            ContentBounds-compatible tuple (left, right, top, bottom, column_profile, row_profile),
+            False for a page known to have no ink, or None when the key is not cached
+        """
+        row = self.connection.execute("SELECT data FROM bounds WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.connection.execute("UPDATE bounds SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.connection.commit()
+        return _decode_bounds(row[0])
+
+    def put(self, key, bounds):
+        """
+        Store bounds (a ContentBounds, or None for a page without ink) and evict old entries if needed.
+        """
+        data = _encode_bounds(bounds)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO bounds (key, data, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, data, len(data), time.time())
+        )
+        self._evict()
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def _evict(self):
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM bounds").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Free down to 90 % of the cap, so eviction does not run on every insert
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        keys = []
+        for key, size in self.connection.execute("SELECT key, size FROM bounds ORDER BY last_used"):
+            keys.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self.connection.executemany("DELETE FROM bounds WHERE key = ?", keys)
+
+    def _value_digest(self, doc, value):
+        """Hash of a PyMuPDF xref_get_key() value and everything it references."""
+        kind, text = value
+        if kind == "xref":
+            return self._object_digest(doc, int(text.split()[0]))
+        source = text.encode("latin-1")
+        digest = hashlib.sha256(kind.encode() + b":" + _REFERENCE.sub(b"R", source))
+        for reference in self._references(doc, source):
+            digest.update(self._object_digest(doc, reference))
+        return digest.digest()
+
+    def _object_digest(self, doc, xref):
+        """
+        Hash of an object and everything it references, with object numbers left out.
+
+        The object graph is walked breadth first without recursion. References are hashed
+        as the position at which the walk first reached the object, so cycles are hashed
+        exactly and the digest only depends on the object it starts from (safe to memoize).
+        """
+        digest = self._object_digests.get(xref)
+        if digest is not None:
+            return digest
+
+        positions = {xref: 0}
+        queue = [xref]
+        digest = hashlib.sha256()
+        for current in queue:  # the queue grows while it is walked
+            own_digest, references = self._object_node(doc, current)
+            digest.update(own_digest)
+            for reference in references:
+                if reference not in positions:
+                    positions[reference] = len(queue)
+                    queue.append(reference)
+                digest.update(b"%d," % positions[reference])
+            digest.update(b";")
+
+        digest = digest.digest()
+        self._object_digests[xref] = digest
+        return digest
+
+    def _object_node(self, doc, xref):
+        """(hash of the object itself with references blanked out, referenced xrefs in order)."""
+        node = self._object_nodes.get(xref)
+        if node is None:
+            source = doc.xref_object(xref, compressed=True).encode("latin-1")
+            own_digest = hashlib.sha256(_REFERENCE.sub(b"R", source))
+            if doc.xref_is_stream(xref):
+                own_digest.update(doc.xref_stream_raw(xref) or b"")
+            node = self._object_nodes[xref] = (own_digest.digest(), self._references(doc, source))
+        return node
+
+    def _references(self, doc, source):
+        """Objects referenced in source, without the pages (link destinations and the like)."""
+        if self._page_xrefs is None:
+            self._page_xrefs = {doc.page_xref(index) for index in range(doc.page_count)}
+        xref_count = doc.xref_length()
+        references = []
+        for match in _REFERENCE.finditer(source):
+            reference = int(match.group(1))
+            if reference not in self._page_xrefs and 0 < reference < xref_count:
+                references.append(reference)
+        return references
+
+def _encode_bounds(bounds):
+    import numpy as np
+
+    if bounds is None:
+        return zlib.compress(np.array([-1], dtype=np.int64).tobytes())
+    left, right, top, bottom, column_profile, row_profile = bounds
+    header = np.array([left, right, top, bottom, len(column_profile), len(row_profile)], dtype=np.int64)
+    return zlib.compress(header.tobytes() + np.asarray(column_profile, dtype=np.int32).tobytes()
+                         + np.asarray(row_profile, dtype=np.int32).tobytes())
+
+def _decode_bounds(data):
+    import numpy as np
+
+    raw = zlib.decompress(data)
+    if len(raw) == 8:
+        return False
+    left, right, top, bottom, columns, rows = (int(value) for value in np.frombuffer(raw[:48], dtype=np.int64))
+    profiles = np.frombuffer(raw[48:], dtype=np.int32)
+    return left, right, top, bottom, profiles[:columns], profiles[columns:columns + rows]
@@ -0,0 +1,162 @@
+### PdfReader for very large PDFs: memory-mapped, and only the objects of the pages you use are read ###
+
+import mmap
+from collections import OrderedDict
+from io import BytesIO
+from PyPDF2 import PdfReader
+from PyPDF2._page import PageObject
+from PyPDF2._utils import read_non_whitespace
+from PyPDF2.errors import PdfReadError, PdfStreamError
+from PyPDF2.generic import IndirectObject, NameObject, NullObject, read_object
+
+# Page attributes a page takes from its parents in the page tree when it has none of its own
+_INHERITABLE = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+class LazyPdfReader(PdfReader):
+    """
+    A PdfReader that maps the file into memory instead of reading it, and resolves objects
+    only when a page needs them.
+
+    PdfReader(path) copies the whole file into memory and builds the list of every page on
+    first use. This reader instead:
+        - memory-maps the file, so only the parts that are read are loaded by the OS
+        - finds page n by walking down the page tree with the /Count of each node, without
+          loading the other branches (falls back to the full page list if /Count is wrong)
+        - keeps decoded object streams in a small LRU cache rather than for the life of the
+          reader, and indexes each one once instead of scanning it for every object
+
+    Copying 40 pages of a 2 GB book therefore reads the xref table plus those 40 pages'
+    objects. Use it like a PdfReader; close it (or use it in a with-block) when done, as the
+    file stays open while it is mapped. The file must not be overwritten while it is open.
+
+    Args:
+        path (str): Path of the PDF
+        object_stream_cache (int): Number of decoded object streams to keep (default: 16)
+        strict (bool): Same as PdfReader (default: False)
+        password: Same as PdfReader (default: None)
+    """
+
+    def __init__(self, path, object_stream_cache=16, strict=False, password=None):
+        self.object_stream_cache = object_stream_cache
+        self._object_streams = OrderedDict()
+        self._pages_by_index = {}
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            super().__init__(self._map, strict=strict, password=password)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        """Unmap and close the file. Pages already copied into a PdfWriter stay valid."""
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def _get_num_pages(self):
+        if self.is_encrypted or self.flattened_pages is not None:
+            return super()._get_num_pages()
+        return int(self.trailer["/Root"].get_object()["/Pages"].get_object()["/Count"])
+
+    def _get_page(self, page_number):
+        if self.flattened_pages is not None:
+            return super()._get_page(page_number)
+        page = self._pages_by_index.get(page_number)
+        if page is None:
+            page = self._find_page(page_number)
+            if page is None:
+                # The /Count values of the page tree do not add up: use the full page list
+                self._flatten()
+                return self.flattened_pages[page_number]
+            self._pages_by_index[page_number] = page
+        return page
+
+    def _find_page(self, page_number):
+        """Walk down the page tree to one page, or return None if the tree does not match its /Count."""
+        reference = self.trailer["/Root"].get_object().raw_get("/Pages")
+        inherited = {}
+        while True:
+            node = reference.get_object()
+            if node.get("/Type") == "/Page" or "/Kids" not in node:
+                if page_number != 0:
+                    return None
+                page = PageObject(self, reference if isinstance(reference, IndirectObject) else None)
+                page.update(node)
+                for name, value in inherited.items():
+                    if name not in page:
+                        page[NameObject(name)] = value
+                return page
+
+            for name in _INHERITABLE:
+                if name in node:
+                    inherited[name] = node[name]
+            kids = node["/Kids"]
+            if page_number < len(kids) and node.get("/Count") == len(kids):
+                # A flat list of pages (the usual layout): go straight to the kid without loading its siblings
+                if "/Kids" not in kids[page_number].get_object():
+                    reference = kids[page_number]
+                    page_number = 0
+                    continue
+            for kid in kids:
+                kid_node = kid.get_object()
+                count = int(kid_node.get("/Count", 1)) if "/Kids" in kid_node else 1
+                if page_number < count:
+                    reference = kid
+                    break
+                page_number -= count
+            else:
+                return None
+
+    def _get_object_from_stream(self, indirect_reference):
+        stream_number, _ = self.xref_objStm[indirect_reference.idnum]
+        entry = self._object_streams.get(stream_number)
+        if entry is None:
+            entry = self._load_object_stream(stream_number)
+            self._object_streams[stream_number] = entry
+            while len(self._object_streams) > max(1, self.object_stream_cache):
+                self._object_streams.popitem(last=False)
+        else:
+            self._object_streams.move_to_end(stream_number)
+
+        data, offsets = entry
+        offset = offsets.get(indirect_reference.idnum)
+        if offset is None:
+            if self.strict:
+                raise PdfReadError(f"Object {indirect_reference.idnum} is not in object stream {stream_number}")
+            return NullObject()
+
+        # BytesIO shares the bytes instead of copying them
+        stream = BytesIO(data)
+        stream.seek(offset)
+        read_non_whitespace(stream)
+        stream.seek(-1, 1)
+        try:
+            return read_object(stream, self)
+        except PdfStreamError as e:
+            if self.strict:
+                raise PdfReadError(f"Can't read object stream: {e}")
+            return NullObject()
+
+    def _load_object_stream(self, stream_number):
+        """Decode an object stream once and index where each object starts in it."""
+        key = (0, stream_number)
+        was_cached = key in self.resolved_objects
+        object_stream = IndirectObject(stream_number, 0, self).get_object()
+        if not was_cached:
+            # The LRU cache owns the decoded data; do not keep the stream for the life of the reader
+            self.resolved_objects.pop(key, None)
+
+        data = object_stream.get_data()
+        first = int(object_stream["/First"])
+        numbers = data[:first].split()
+        offsets = {int(numbers[i]): first + int(numbers[i + 1]) for i in range(0, len(numbers) - 1, 2)}
+        return data, offsets
@@ -0,0 +1,250 @@
+### Page selection shared by all the PDF tools, e.g. "1-10,15,!7,40-" ###
+
+import bisect
+
+class PageSet:
+    """
+    A set of page numbers (1-indexed) stored as sorted, non-overlapping inclusive intervals.
+
+    A selection of 10,000 pages in one range costs one interval, not 10,000 integers.
+    Membership tests use binary search (O(log n) in the number of intervals).
+
+    Args:
+        intervals: Iterable of (first, last) page pairs, in any order, overlapping or not
+    """
+
+    def __init__(self, intervals=()):
+        self.intervals = _normalize_intervals(intervals)
+        self._firsts = [first for first, _ in self.intervals]
+
+    @classmethod
+    def from_pages(cls, pages):
+        """Build a PageSet from individual page numbers (1-indexed)."""
+        return cls((page, page) for page in pages)
+
+    @classmethod
+    def all_pages(cls, page_count):
+        """Every page of a document with page_count pages."""
+        return cls([(1, page_count)] if page_count > 0 else [])
+
+    def __contains__(self, page):
+        index = bisect.bisect_right(self._firsts, page) - 1
+        return index >= 0 and page <= self.intervals[index][1]
+
+    def __iter__(self):
+        for first, last in self.intervals:
+            yield from range(first, last + 1)
+
+    def __len__(self):
+        return sum(last - first + 1 for first, last in self.intervals)
+
+    def __bool__(self):
+        return bool(self.intervals)
+
+    def __eq__(self, other):
+        return isinstance(other, PageSet) and self.intervals == other.intervals
+
+    def __str__(self):
+        return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in self.intervals)
+
+    def __repr__(self):
+        return f"PageSet('{self}')"
+
+    def union(self, other):
+        return PageSet(self.intervals + other.intervals)
+
+    def difference(self, other):
+        result = []
+        other_intervals = other.intervals
+        index = 0
+        for first, last in self.intervals:
+            # Skip intervals of other that end before this one starts
+            while index < len(other_intervals) and other_intervals[index][1] < first:
+                index += 1
+            current = first
+            scan = index
+            while scan < len(other_intervals) and other_intervals[scan][0] <= last:
+                cut_first, cut_last = other_intervals[scan]
+                if cut_first > current:
+                    result.append((current, cut_first - 1))
+                current = max(current, cut_last + 1)
+                scan += 1
+            if current <= last:
+                result.append((current, last))
+        return PageSet(result)
+
+    def intersection(self, other):
+        return self.difference(self.difference(other))
+
+    def complement(self, page_count):
+        """Pages of a page_count-page document that are not in this set."""
+        return PageSet.all_pages(page_count).difference(self)
+
+    def clip(self, page_count):
+        """Drop pages outside 1..page_count."""
+        return self.intersection(PageSet.all_pages(page_count))
+
+    def ranges(self):
+        """The intervals as 0-indexed (start, stop) pairs with stop exclusive, like range()."""
+        return [(first - 1, last) for first, last in self.intervals]
+
+    __or__ = union
+    __sub__ = difference
+    __and__ = intersection
+
+def parse_page_spec(spec, page_count=None):
+    """
+    Parse a page expression into a PageSet.
+
+    Syntax (comma separated, 1-indexed):
+        5        single page
+        15-20    inclusive range
+        40-      from page 40 to the last page
+        -1       pages counted from the end (-1 is the last page, -2 the one before)
+        -3-      the last three pages
+        !7       exclude page 7 (also works with ranges: !10-12)
+    An expression that only contains exclusions starts from all pages; an empty expression
+    selects no pages.
+
+    Args:
+        spec (str): Page expression
+        page_count (int): Number of pages in the document. Needed for open-ended ranges,
+                          negative pages and exclusion-only expressions; pages beyond it are dropped.
+
+    Returns:
+        PageSet: Selected pages
+
+    Raises:
+        ValueError: If the expression is invalid
+    """
+    included = []
+    excluded = []
+    has_includes = False
+    has_excludes = False
+
+    for part in spec.split(','):
+        part = part.replace(' ', '')
+        if not part:
+            continue
+
+        exclude = part.startswith('!')
+        if exclude:
+            part = part[1:]
+            has_excludes = True
+        else:
+            has_includes = True
+
+        interval = _parse_interval(part, page_count)
+        if interval is None:
+            continue
+        (excluded if exclude else included).append(interval)
+
+    if has_includes or not has_excludes:
+        pages = PageSet(included)
+    else:
+        if page_count is None:
+            raise ValueError(f"Page expression '{spec}' needs the page count of the document")
+        pages = PageSet.all_pages(page_count)
+
+    pages = pages.difference(PageSet(excluded))
+    if page_count is not None:
+        pages = pages.clip(page_count)
+    return pages
+
+def as_page_set(pages, page_count=None):
+    """
+    Accept any page selection used by the tools and return it as a PageSet.
+
+    Args:
+        pages: None, a PageSet, a page expression string or an iterable of page numbers (1-indexed)
+        page_count (int): Number of pages in the document (pages beyond it are dropped)
+
+    Returns:
+        PageSet: Selected pages (empty for None)
+    """
+    if pages is None:
+        result = PageSet()
+    elif isinstance(pages, PageSet):
+        result = pages
+    elif isinstance(pages, str):
+        return parse_page_spec(pages, page_count)
+    else:
+        result = PageSet.from_pages(page for page in pages if isinstance(page, int) and page > 0)
+
+    if page_count is not None:
+        result = result.clip(page_count)
+    return result
+
+def exclude_pages(pages):
+    """
+    Turn pages to skip into a page expression that selects every other page, e.g. [2, 7] -> "!2,!7".
+
+    Useful where the page count is not known yet: the expression is resolved later by parse_page_spec.
+
+    Args:
+        pages: Pages to skip: a page expression, a PageSet or a list of page numbers (1-indexed)
+
+    Returns:
+        str: Page expression ("" when there is nothing to skip, which selects no pages: pass
+             None instead where all pages should be kept)
+    """
+    if isinstance(pages, str):
+        parts = pages.split(',')
+    elif isinstance(pages, PageSet):
+        parts = str(pages).split(',')
+    else:
+        parts = [str(page) for page in pages if isinstance(page, int) and page > 0]
+    return ",".join("!" + part.strip() for part in parts if part.strip())
+
+def _parse_interval(part, page_count):
+    """Parse 'N', 'A-B', 'A-' (A and B may be negative) into a (first, last) pair, or None if empty."""
+    negative_start = part.startswith('-')
+    body = part[1:] if negative_start else part
+
+    if '-' in body:
+        start_text, end_text = body.split('-', 1)
+        start_text = ('-' if negative_start else '') + start_text
+    else:
+        start_text, end_text = part, None
+
+    try:
+        first = _resolve_page(int(start_text), page_count, part)
+        if end_text is None:
+            last = first
+        elif end_text == '':
+            if page_count is None:
+                raise ValueError(f"Open range '{part}' needs the page count of the document")
+            last = page_count
+        else:
+            last = _resolve_page(int(end_text), page_count, part)
+    except ValueError as e:
+        if 'page count' in str(e):
+            raise
+        raise ValueError(f"Invalid page expression '{part}'") from None
+
+    if first > last:
+        if page_count is not None and first > page_count:
+            return None  # open range starting after the last page
+        raise ValueError(f"Invalid page range '{part}': start is after end")
+    return (first, last)
+
+def _resolve_page(number, page_count, part):
+    if number > 0:
+        return number
+    if number == 0:
+        raise ValueError(f"Invalid page expression '{part}'")
+    if page_count is None:
+        raise ValueError(f"Negative page '{part}' needs the page count of the document")
+    return max(page_count + number + 1, 1)
+
+def _normalize_intervals(intervals):
+    """Sort intervals and merge overlapping or adjacent ones."""
+    merged = []
+    for first, last in sorted((int(first), int(last)) for first, last in intervals):
+        if first > last:
+            continue
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return [tuple(interval) for interval in merged]
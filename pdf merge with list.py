@@ -1,9 +1,21 @@
-import os
-from PyPDF2 import PdfMerger
+from pdf_finalize import finalize_pdf
+from pdf_merge import merge_list
 
 # Define the folder path
 folder_path = r'C:\Users\ajayb\OneDrive - Tribhuvan University\Desktop\pdf'
 
+# 👉 Streaming merge: writes each PDF out as it is read, so memory stays flat for thousands of files
+# (bookmarks of the inputs are not kept in this mode)
+streaming_merge = False
+max_open_files = 8  # used by the streaming merge
+
+# 👉 Store fonts, images and other resources shared by the PDFs only once (uses the streaming merge)
+remove_duplicates = False
+
+# 👉 Final save: None (keep as written), "fast", "balanced" (smaller, lossless) or "smallest" (also recompresses large images as JPEG)
+finalize_profile = None
+linearize = False  # fast web view for the document server (needs pikepdf)
+
 # 👉 SECTION: List the PDF filenames in the exact order you want to merge
 pdf_list = [
     "1.pdf",
@@ -13,35 +25,21 @@ pdf_list = [
     "15.pdf",
 ]
 
-# Filter available files
-available_files = [pdf for pdf in pdf_list if os.path.exists(os.path.join(folder_path, pdf))]
-missing_files = [pdf for pdf in pdf_list if pdf not in available_files]
+# Merge the available PDFs into "<first>-<last>.pdf" using the first and last available filenames
+try:
+    output_path, missing_files = merge_list(folder_path, pdf_list, streaming=streaming_merge,
+                                            max_open_files=max_open_files, dedup=remove_duplicates)
+except ValueError:
+    print("❌ No valid PDF files found to merge.")
+    exit()
 
 # Report missing files
 if missing_files:
-    print("⚠️ These files are missing and will be skipped:")
+    print("⚠️ These files were missing and have been skipped:")
     for missing in missing_files:
         print(" -", missing)
 
-# Check if anything remains to merge
-if not available_files:
-    print("❌ No valid PDF files found to merge.")
-    exit()
-
-# Define output file name using first and last available filenames
-first_name = os.path.splitext(available_files[0])[0]
-last_name = os.path.splitext(available_files[-1])[0]
-output_filename = f'{first_name}-{last_name}.pdf'
-output_path = os.path.join(folder_path, output_filename)
-
-# Merge available PDFs
-merger = PdfMerger()
-
-for pdf in available_files:
-    merger.append(os.path.join(folder_path, pdf))
-
-# Save the merged PDF
-merger.write(output_path)
-merger.close()
+if finalize_profile:
+    finalize_pdf(output_path, profile=finalize_profile, linearize=linearize)
 
 print(f"\n✅ Merged PDF saved as: {output_path}")
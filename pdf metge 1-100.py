@@ -1,9 +1,25 @@
-import os
-from PyPDF2 import PdfMerger
+from pdf_finalize import finalize_pdf
+from pdf_merge import merge_folder, numbered_pdfs
 
 # Define the folder path
 folder_path = r'C:\Users\ajayb\OneDrive - Tribhuvan University\Desktop\pdf'
 
+# 👉 Streaming merge: writes each PDF out as it is read, so memory stays flat for thousands of files
+# (bookmarks of the inputs are not kept in this mode)
+streaming_merge = False
+max_open_files = 8  # used by the streaming merge
+
+# 👉 Store fonts, images and other resources shared by the PDFs only once (uses the streaming merge)
+remove_duplicates = False
+
+# 👉 Incremental merge: remembers what went into the last output (.merge-manifest.json in the folder),
+# so re-running after adding PDFs only appends the new ones instead of rebuilding everything
+incremental_merge = False
+
+# 👉 Final save: None (keep as written), "fast", "balanced" (smaller, lossless) or "smallest" (also recompresses large images as JPEG)
+finalize_profile = None
+linearize = False  # fast web view for the document server (needs pikepdf)
+
 # 👉 SECTION: List of PDF filenames to skip (include extension)
 skip_list = [
     "2.pdf",    # Example: skip 2.pdf
@@ -11,31 +27,20 @@ skip_list = [
     # "13.pdf",
 ]
 
-# Get all PDF filenames in the folder, filter and sort them numerically
-pdf_files = sorted(
-    [f for f in os.listdir(folder_path) if f.endswith('.pdf') and f not in skip_list],
-    key=lambda x: int(os.path.splitext(x)[0])
-)
+# Get all numbered PDF filenames in the folder (1.pdf, 2.pdf, ...), filter and sort them numerically
+pdf_files = numbered_pdfs(folder_path, skip_list)
 
 # If there are no PDF files, exit
 if not pdf_files:
     print("No PDF files found to merge (or all skipped).")
     exit()
 
-# Define output file name using the first and last valid PDF names
-first_name = os.path.splitext(pdf_files[0])[0]
-last_name = os.path.splitext(pdf_files[-1])[0]
-output_filename = f'{first_name}-{last_name}.pdf'
-output_path = os.path.join(folder_path, output_filename)
-
-# Merge PDFs
-merger = PdfMerger()
-
-for pdf in pdf_files:
-    merger.append(os.path.join(folder_path, pdf))
+# Merge PDFs into "<first>-<last>.pdf" using the first and last valid PDF names
+output_path = merge_folder(folder_path, skip_list=skip_list, streaming=streaming_merge,
+                           max_open_files=max_open_files, dedup=remove_duplicates, incremental=incremental_merge)
 
-# Write out the merged PDF
-merger.write(output_path)
-merger.close()
+# Finalizing rewrites the output, so the next incremental merge could not reuse it
+if finalize_profile and not incremental_merge:
+    finalize_pdf(output_path, profile=finalize_profile, linearize=linearize)
 
 print(f"Merged PDF saved as: {output_path}")
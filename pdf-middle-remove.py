@@ -1,26 +1,36 @@
-from PyPDF2 import PdfReader, PdfWriter
+from pdf_finalize import finalize_pdf
+from pdf_split import cut_pages, remove_pages as remove_pdf_pages
 
 # Input and output file paths
 input_path = r"C:\Users\ajayb\OneDrive - Tribhuvan University\Desktop\raga\PRE-PRINT\SONG-FINAL.pdf"
 output_path = r"C:\Users\ajayb\OneDrive - Tribhuvan University\Desktop\raga\PRE-PRINT\SONG-FINAL-split.pdf"
 
-# Define the range of pages to remove (0-based index)
-remove_start = 15 # first page to remove
-remove_end = 30    # last page to remove (inclusive)
+# Define the pages to remove (1-based, inclusive), e.g. "16-31" or several ranges "16-31,40-42"
+remove_pages = "16-31"
 
-# Load the PDF
-reader = PdfReader(input_path)
-writer = PdfWriter()
+# 👉 How to remove them:
+#    "copy"        - copy every kept page into a new PDF (PyPDF2)
+#    "compact"     - delete the pages from the page tree and save once without their unused fonts/images (fast)
+#    "incremental" - delete the pages and append the change to a copy of the file (fastest, file does not shrink)
+remove_method = "copy"
 
-total_pages = len(reader.pages)
+# 👉 Big books: memory-map the PDF instead of loading the whole file ("copy" only)
+lazy_reader = True
 
-# Add pages to writer, skipping the range to remove
-for page_num in range(total_pages):
-    if page_num < remove_start or page_num > remove_end:
-        writer.add_page(reader.pages[page_num])
+# 👉 Final save: None (keep as written), "fast", "balanced" (smaller, lossless) or "smallest" (also recompresses large images as JPEG)
+finalize_profile = None
+linearize = False  # fast web view for the document server (needs pikepdf)
 
-# Write to new PDF
-with open(output_path, "wb") as output_file:
-    writer.write(output_file)
+# Write the PDF without those pages
+if remove_method == "copy":
+    pages_removed = remove_pdf_pages(input_path, output_path, remove_pages, lazy=lazy_reader)
+else:
+    pages_removed = cut_pages(input_path, output_path, remove_pages, incremental=remove_method == "incremental")
 
-print(f"PDF created successfully without pages {remove_start+1} to {remove_end+1}: {output_path}")
+# Finalizing rewrites the whole file, which would undo the incremental save
+if finalize_profile and remove_method == "incremental":
+    print(f"⚠️ Finalize profile '{finalize_profile}' is not used with remove_method = \"incremental\"")
+elif finalize_profile:
+    finalize_pdf(output_path, profile=finalize_profile, linearize=linearize)
+
+print(f"PDF created successfully without pages {pages_removed}: {output_path}")
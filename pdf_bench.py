@@ -0,0 +1,390 @@
+### Benchmark the PDF tools on generated PDFs and compare the results with a saved baseline ###
+#
+# python pdf_bench.py                                   # full run, results in bench-results.json
+# python pdf_bench.py --pages 1 100 --kinds text        # smaller run
+# python pdf_bench.py --baseline bench-baseline.json    # compare (exit code 1 on a regression)
+# python pdf_bench.py --save-baseline bench-baseline.json
+#
+# Every case runs in its own Python process, so wall time and peak memory are not affected by
+# the other cases. The scripts themselves are run with their config lines replaced (input
+# folders, page ranges...), so the benchmark times exactly what the scripts do.
+
+import argparse
+import ast
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DOCUMENT_KINDS = ("text", "image", "mixed")
+DEFAULT_PAGE_COUNTS = (1, 100, 1000, 5000)
+PARTS_PER_CORPUS = 10   # the folder/list merges read the document split into this many files
+MARGIN_PAGES = 10       # the raster margin case renders this many pages at most (it is ~1 s per page)
+
+# case name -> short description; the work itself is in _run_case
+BENCHMARK_CASES = {
+    "split": "PDFSPLITANDMERGE.PY, extract the first half of the document",
+    "split_many": "PDFSPLITANDMERGE.PY with a split manifest, one file per 10 pages",
+    "middle_remove": "pdf-middle-remove.py, remove the middle third",
+    "list_merge": "pdf merge with list.py, merge all parts",
+    "folder_merge": "pdf metge 1-100.py, merge all parts",
+    "folder_merge_streaming": "pdf metge 1-100.py with streaming_merge = True",
+    "skip_merge": "skip and merge pdf.py, merge all parts without their first page",
+    "margin_raster": f"pdf_margin.py raster mode on the first {MARGIN_PAGES} pages",
+    "margin_vector": "pdf_margin.py vector mode on all pages",
+}
+
+def build_corpus(corpus_root, kind, page_count, shared_fonts, parts=PARTS_PER_CORPUS):
+    """
+    Generate (or reuse) one synthetic corpus.
+
+    A corpus is one document.pdf with page_count pages plus the same pages split over up to
+    `parts` numbered files (parts/1.pdf, parts/2.pdf, ...) for the merge scripts.
+
+    Args:
+        corpus_root (str): Folder that holds all generated corpora
+        kind (str): "text" (text only), "image" (one scanned-looking image per page) or
+                    "mixed" (text on every page, an image on every second page)
+        page_count (int): Number of pages
+        shared_fonts (bool): Embed the same font in every file (what deduplication can save)
+                             instead of using the non-embedded base-14 Helvetica
+        parts (int): Maximum number of part files (default: PARTS_PER_CORPUS)
+
+    Returns:
+        dict: Corpus description: name, kind, pages, shared_fonts, document, parts_dir, parts
+    """
+    import fitz
+
+    name = f"{kind}-{page_count}p-{'shared-fonts' if shared_fonts else 'base14'}"
+    corpus_dir = os.path.join(corpus_root, name)
+    info_path = os.path.join(corpus_dir, "corpus.json")
+    if os.path.exists(info_path):
+        with open(info_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    shutil.rmtree(corpus_dir, ignore_errors=True)
+    parts_dir = os.path.join(corpus_dir, "parts")
+    os.makedirs(parts_dir)
+
+    font_buffer = fitz.Font("tiro").buffer if shared_fonts else None
+    part_count = max(1, min(parts, page_count))
+    part_sizes = [page_count // part_count + (1 if index < page_count % part_count else 0)
+                  for index in range(part_count)]
+
+    document = fitz.open()
+    page_number = 0
+    for part_index, part_size in enumerate(part_sizes):
+        part = fitz.open()
+        for _ in range(part_size):
+            page_number += 1
+            _add_synthetic_page(part, kind, page_number, font_buffer)
+        part.save(os.path.join(parts_dir, f"{part_index + 1}.pdf"), garbage=3, deflate=True)
+        document.insert_pdf(part)
+        part.close()
+    document_path = os.path.join(corpus_dir, "document.pdf")
+    document.save(document_path, garbage=3, deflate=True)
+    document.close()
+
+    info = {
+        "name": name,
+        "kind": kind,
+        "pages": page_count,
+        "shared_fonts": shared_fonts,
+        "document": document_path,
+        "parts_dir": parts_dir,
+        "parts": [f"{index + 1}.pdf" for index in range(part_count)],
+    }
+    with open(info_path, "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+def _add_synthetic_page(doc, kind, page_number, font_buffer):
+    """Append one A4 page of the given kind; the left margin varies so margin detection has work to do."""
+    import fitz
+
+    page = doc.new_page(width=595, height=842)
+    left = 60 + (page_number * 37) % 90
+    font_name = "helv"
+    if font_buffer is not None:
+        font_name = "F-bench"
+        page.insert_font(fontname=font_name, fontbuffer=font_buffer)
+
+    if kind in ("image", "mixed") and (kind == "image" or page_number % 2 == 0):
+        # A low-resolution rendering of a text page looks like a scan and differs on every page
+        scratch = fitz.open()
+        scratch_page = scratch.new_page(width=595, height=842)
+        for line in range(40):
+            scratch_page.insert_text((left, 60 + line * 19),
+                                     f"Scanned page {page_number} line {line} the quick brown fox", fontsize=10)
+        pix = scratch_page.get_pixmap(dpi=60, colorspace=fitz.csGRAY)
+        image_rect = fitz.Rect(0, 0, 595, 842) if kind == "image" else fitz.Rect(left, 430, 545, 800)
+        page.insert_image(image_rect, stream=pix.tobytes("jpeg"))
+        scratch.close()
+        if kind == "image":
+            page.insert_text((left, 830), f"Page {page_number}", fontname=font_name, fontsize=8)
+            return
+
+    line_count = 18 if kind == "mixed" else 38
+    for line in range(line_count):
+        page.insert_text((left, 60 + line * 19),
+                         f"Page {page_number} line {line}: lorem ipsum dolor sit amet, consectetur adipiscing",
+                         fontname=font_name, fontsize=10)
+
+def run_benchmarks(cases, corpora, output_dir, timeout=None):
+    """
+    Run every case on every corpus, each in a fresh Python process.
+
+    Args:
+        cases (list): Case names from BENCHMARK_CASES
+        corpora (list): Corpus descriptions from build_corpus
+        output_dir (str): Scratch folder for the outputs (emptied before each case)
+        timeout (float): Seconds before a case is stopped and recorded as "timeout" (default: None)
+
+    Returns:
+        list: One result dict per case and corpus
+    """
+    results = []
+    for corpus in corpora:
+        for case in cases:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            os.makedirs(output_dir)
+            command = [sys.executable, os.path.abspath(__file__), "--run-case", case,
+                       json.dumps(corpus), output_dir]
+            try:
+                completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+                lines = completed.stdout.strip().splitlines()
+                if completed.returncode == 0 and lines:
+                    result = json.loads(lines[-1])
+                else:
+                    error = (completed.stderr.strip().splitlines() or ["no output"])[-1]
+                    result = {"status": "error", "error": error}
+            except subprocess.TimeoutExpired:
+                result = {"status": "timeout"}
+
+            result = {"case": case, "corpus": corpus["name"], **result}
+            results.append(result)
+            _print_result(result)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    return results
+
+def compare_with_baseline(results, baseline, tolerance=0.2):
+    """
+    Compare results with a baseline run.
+
+    A case regresses when its wall time or peak memory grows by more than `tolerance`
+    (0.2 = 20 %) or when it failed now but passed in the baseline.
+
+    Args:
+        results (list): Results of this run
+        baseline (list): Results of the baseline run
+        tolerance (float): Allowed relative growth (default: 0.2)
+
+    Returns:
+        list: (case, corpus, message) for every regression
+    """
+    baseline_by_key = {(item["case"], item["corpus"]): item for item in baseline}
+    regressions = []
+
+    print(f"\n{'case':<24}{'corpus':<30}{'time':>10}{'memory':>10}{'size':>10}")
+    for result in results:
+        key = (result["case"], result["corpus"])
+        before = baseline_by_key.get(key)
+        if before is None or before.get("status") != "ok":
+            continue
+        if result.get("status") != "ok":
+            regressions.append((*key, f"{result.get('status')} (was ok)"))
+            continue
+
+        changes = {metric: _relative_change(before.get(metric), result.get(metric))
+                   for metric in ("wall_seconds", "peak_rss_mb", "output_bytes")}
+        print(f"{key[0]:<24}{key[1]:<30}" + "".join(f"{_format_change(change):>10}" for change in changes.values()))
+        for metric in ("wall_seconds", "peak_rss_mb"):
+            if changes[metric] is not None and changes[metric] > tolerance:
+                regressions.append((*key, f"{metric} {before[metric]} -> {result[metric]}"))
+    return regressions
+
+def _relative_change(before, after):
+    if not before or after is None:
+        return None
+    return (after - before) / before
+
+def _format_change(change):
+    return "-" if change is None else f"{change:+.0%}"
+
+def _print_result(result):
+    if result.get("status") != "ok":
+        print(f"❌ {result['case']:<24}{result['corpus']:<30}{result.get('status')}: {result.get('error', '')}")
+        return
+    rss = f"{result['peak_rss_mb']:.0f} MB" if result.get("peak_rss_mb") is not None else "n/a"
+    print(f"✅ {result['case']:<24}{result['corpus']:<30}{result['wall_seconds']:>8.2f} s"
+          f"{result['pages_per_second']:>10.1f} pages/s{rss:>10}{result['output_bytes'] / 1e6:>10.2f} MB")
+
+def _run_case(case, corpus, output_dir):
+    """Run one case in this process and return its measurements (called in the child process)."""
+    pages = corpus["pages"]
+    parts_dir = corpus["parts_dir"]
+    parts_before = set(os.listdir(parts_dir))
+    pages_processed = pages
+
+    start = time.perf_counter()
+    if case == "split":
+        pages_processed = max(1, pages // 2)
+        _run_script("PDFSPLITANDMERGE.PY", input_path=corpus["document"],
+                    output_path=os.path.join(output_dir, "split.pdf"), pages=f"1-{pages_processed}")
+    elif case == "split_many":
+        manifest_path = os.path.join(output_dir, "manifest.csv")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            for first in range(1, pages + 1, 10):
+                f.write(f"part-{first:05d},{first}-{min(first + 9, pages)}\n")
+        _run_script("PDFSPLITANDMERGE.PY", input_path=corpus["document"],
+                    output_path=os.path.join(output_dir, "unused.pdf"), split_manifest=manifest_path)
+    elif case == "middle_remove":
+        first = pages // 3 + 1
+        _run_script("pdf-middle-remove.py", input_path=corpus["document"],
+                    output_path=os.path.join(output_dir, "removed.pdf"),
+                    remove_pages=f"{first}-{max(first, 2 * pages // 3)}")
+    elif case == "list_merge":
+        _run_script("pdf merge with list.py", folder_path=parts_dir, pdf_list=corpus["parts"])
+    elif case in ("folder_merge", "folder_merge_streaming"):
+        _run_script("pdf metge 1-100.py", folder_path=parts_dir, skip_list=[],
+                    streaming_merge=case == "folder_merge_streaming")
+    elif case == "skip_merge":
+        _run_script("skip and merge pdf.py", folder_path=parts_dir,
+                    pdf_skip_dict={name: [1] for name in corpus["parts"]})
+    elif case in ("margin_raster", "margin_vector"):
+        import pdf_margin
+        mode = case.split("_")[1]
+        if mode == "raster":
+            pages_processed = min(pages, MARGIN_PAGES)
+        pdf_margin.adjust_pdf_margins(corpus["document"], os.path.join(output_dir, "margins.pdf"),
+                                      2.0, pages_to_process=f"1-{pages_processed}", mode=mode)
+    else:
+        raise ValueError(f"Unknown benchmark case '{case}'")
+    wall_seconds = time.perf_counter() - start
+
+    # The merge scripts write next to their inputs: count those outputs, then remove them
+    output_bytes = 0
+    for name in set(os.listdir(parts_dir)) - parts_before:
+        path = os.path.join(parts_dir, name)
+        output_bytes += os.path.getsize(path)
+        os.remove(path)
+    for name in os.listdir(output_dir):
+        if name.lower().endswith(".pdf"):
+            output_bytes += os.path.getsize(os.path.join(output_dir, name))
+
+    from pdf_metrics import peak_rss_mb
+
+    return {
+        "status": "ok",
+        "pages": pages_processed,
+        "wall_seconds": round(wall_seconds, 4),
+        "pages_per_second": round(pages_processed / wall_seconds, 2) if wall_seconds > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "output_bytes": output_bytes,
+    }
+
+def _run_script(script_name, **config):
+    """Run one of the tool scripts with some of its top-level config variables replaced."""
+    script_path = os.path.join(TOOLS_DIR, script_name)
+    with open(script_path, encoding="utf-8") as f:
+        source = f.read()
+
+    lines = source.splitlines()
+    tree = ast.parse(source)
+    replaced = set()
+    # Replace from the bottom up so the line numbers of earlier assignments stay valid
+    for node in sorted(tree.body, key=lambda node: node.lineno, reverse=True):
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name) and node.targets[0].id in config
+                and node.targets[0].id not in replaced):
+            name = node.targets[0].id
+            lines[node.lineno - 1:node.end_lineno] = [f"{name} = {config[name]!r}"]
+            replaced.add(name)
+    missing = set(config) - replaced
+    if missing:
+        raise ValueError(f"{script_name} has no config variable(s): {', '.join(sorted(missing))}")
+
+    with open(os.devnull, "w") as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull  # the scripts' progress output is not part of the measurement
+        try:
+            exec(compile("\n".join(lines), script_path, "exec"), {"__name__": "__main__", "__file__": script_path})
+        finally:
+            sys.stdout = stdout
+
+def _library_versions():
+    versions = {"python": platform.python_version(), "platform": platform.platform()}
+    try:
+        import PyPDF2
+        versions["PyPDF2"] = PyPDF2.__version__
+    except ImportError:
+        pass
+    try:
+        import fitz
+        versions["PyMuPDF"] = fitz.VersionBind
+    except ImportError:
+        pass
+    return versions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PDF tools on synthetic PDFs.")
+    parser.add_argument("--pages", type=int, nargs="+", default=list(DEFAULT_PAGE_COUNTS),
+                        help="page counts of the generated documents")
+    parser.add_argument("--kinds", nargs="+", choices=DOCUMENT_KINDS, default=list(DOCUMENT_KINDS))
+    parser.add_argument("--fonts", choices=("base14", "shared", "both"), default="both",
+                        help="base-14 fonts, the same embedded font in every file, or both")
+    parser.add_argument("--cases", nargs="+", choices=list(BENCHMARK_CASES), default=list(BENCHMARK_CASES))
+    parser.add_argument("--corpus-dir", default=os.path.join(TOOLS_DIR, "bench-corpus"),
+                        help="where generated PDFs are kept between runs")
+    parser.add_argument("--output", default="bench-results.json", help="JSON file for the results")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also save the results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown/memory growth (0.2 = 20%%)")
+    parser.add_argument("--timeout", type=float, help="seconds before a case is stopped")
+    parser.add_argument("--run-case", nargs=3, metavar=("CASE", "CORPUS", "OUTPUT_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        case, corpus, output_dir = args.run_case
+        sys.path.insert(0, TOOLS_DIR)
+        print(json.dumps(_run_case(case, json.loads(corpus), output_dir)))
+        return 0
+
+    fonts = {"base14": [False], "shared": [True], "both": [False, True]}[args.fonts]
+    corpora = []
+    for kind in args.kinds:
+        for page_count in args.pages:
+            for shared_fonts in fonts:
+                print(f"Preparing corpus {kind}, {page_count} pages, {'shared fonts' if shared_fonts else 'base-14'}...")
+                corpora.append(build_corpus(args.corpus_dir, kind, page_count, shared_fonts))
+
+    print()
+    results = run_benchmarks(args.cases, corpora, os.path.join(args.corpus_dir, "_output"), timeout=args.timeout)
+    run = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), "environment": _library_versions(), "results": results}
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+    print(f"\n📄 Results saved to: {args.output}")
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.save_baseline)
+        print(f"📄 Baseline saved to: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for case, corpus, message in regressions:
+                print(f" - {case} on {corpus}: {message}")
+            return 1
+        print(f"\n✅ No regressions against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
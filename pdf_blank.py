@@ -0,0 +1,162 @@
+### Find blank and near-blank pages (scanner separator sheets) so the merge scripts can leave them out ###
+
+import os
+import re
+import time
+from page_spec import PageSet
+
+# Resolution of the render that measures the ink of a page (a pixel is ~0.7 mm, plenty for "is anything there")
+BLANK_DPI = 36
+
+# Pages with less than this share of ink pixels count as blank (0.002 = 0.2 %; one line of text is ~0.5 %)
+BLANK_INK_RATIO = 0.002
+
+# Gray level below which a pixel counts as ink. Darker than the margin tool's INK_THRESHOLD, so
+# paper tone and text showing through from the back of a scanned sheet do not count.
+BLANK_INK_THRESHOLD = 200
+
+# Share of the page width/height on each side that is ignored (dark scanner edges, punch holes)
+BLANK_EDGE_MARGIN = 0.03
+
+# Pages that show text and whose content is at least this long are not blank; no render needed
+TEXT_CONTENT_BYTES = 1024
+
+# Content stream operators that show text or paint something
+_TEXT_OPERATORS = re.compile(rb"(?:^|[\s\])>])(?:Tj|TJ|'|\")(?=[\s\[(<\/%]|$)")
+_PAINT_OPERATORS = re.compile(rb"(?:^|[\s\])>])(?:Do|BI|sh|f\*?|F|B\*?|b\*?|S|s)(?=[\s\[(<\/%]|$)")
+# Text rendering mode 3 (invisible), used for the OCR layer over scanned pages
+_INVISIBLE_TEXT = re.compile(rb"(?:^|\s)3\s+Tr(?=\s|$)")
+
+def classify_page(page, ink_ratio=BLANK_INK_RATIO, dpi=BLANK_DPI, ink_threshold=BLANK_INK_THRESHOLD,
+                  edge_margin=BLANK_EDGE_MARGIN):
+    """
+    Decide whether a page is blank, looking at its content stream first and rendering only if needed.
+
+    A page without painting operators is blank and a page with plenty of visible text is not,
+    both without rendering. Everything else (scanned images, drawings, a few words) is rendered
+    in grayscale at a low resolution and reduced to an ink profile like the margin detection does.
+
+    Args:
+        page: PyMuPDF page
+        ink_ratio (float): Share of ink pixels below which the page is blank (default: BLANK_INK_RATIO)
+        dpi (int): Render resolution (default: BLANK_DPI)
+        ink_threshold (int): Gray level below which a pixel counts as ink (default: BLANK_INK_THRESHOLD)
+        edge_margin (float): Share of each side that is ignored (default: BLANK_EDGE_MARGIN)
+
+    Returns:
+        tuple: (is_blank, rendered)
+    """
+    contents = page.read_contents()
+    has_text = _TEXT_OPERATORS.search(contents) is not None
+    if not has_text and _PAINT_OPERATORS.search(contents) is None:
+        return True, False
+    if has_text and len(contents) >= TEXT_CONTENT_BYTES and _INVISIBLE_TEXT.search(contents) is None:
+        return False, False
+
+    import fitz
+    import numpy as np
+    from pdf_margin import detect_content_bounds
+
+    pix = page.get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72), colorspace=fitz.csGRAY, alpha=False)
+    gray = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+    margin_x = int(pix.width * edge_margin)
+    margin_y = int(pix.height * edge_margin)
+    inner = gray[margin_y:pix.height - margin_y, margin_x:pix.width - margin_x]
+    try:
+        bounds = detect_content_bounds(inner, ink_threshold)
+        ink_pixels = int(bounds.column_profile.sum()) if bounds else 0
+        return ink_pixels < ink_ratio * max(1, inner.size), True
+    finally:
+        del gray, inner
+        pix = None
+
+def find_blank_pages(pdf_path, ink_ratio=BLANK_INK_RATIO, dpi=BLANK_DPI, ink_threshold=BLANK_INK_THRESHOLD,
+                     edge_margin=BLANK_EDGE_MARGIN):
+    """
+    Find the blank pages of one PDF.
+
+    Args:
+        pdf_path (str): Path of the PDF
+        ink_ratio, dpi, ink_threshold, edge_margin: As for classify_page()
+
+    Returns:
+        tuple: (PageSet of blank pages (1-indexed), stats dict with pages, rendered and seconds)
+    """
+    import fitz
+
+    start = time.perf_counter()
+    blank = []
+    rendered = 0
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            is_blank, was_rendered = classify_page(page, ink_ratio, dpi, ink_threshold, edge_margin)
+            rendered += was_rendered
+            if is_blank:
+                blank.append(page.number + 1)
+        page_count = doc.page_count
+    stats = {"pages": page_count, "rendered": rendered, "seconds": time.perf_counter() - start}
+    return PageSet.from_pages(blank), stats
+
+class BlankPageFilter:
+    """
+    Finds blank pages in many PDFs at once, one worker process per file.
+
+    iter_blank_pages() yields the results in input order as soon as each one is ready, so a
+    merge can start writing the first files while later ones are still being checked.
+
+    Args:
+        ink_ratio, dpi, ink_threshold, edge_margin: As for classify_page()
+        workers (int): Worker processes (default: number of CPUs; 1 = check in this process)
+    """
+
+    def __init__(self, ink_ratio=BLANK_INK_RATIO, dpi=BLANK_DPI, ink_threshold=BLANK_INK_THRESHOLD,
+                 edge_margin=BLANK_EDGE_MARGIN, workers=None):
+        self.settings = (ink_ratio, dpi, ink_threshold, edge_margin)
+        self.workers = workers or os.cpu_count() or 1
+        self.stats = {"files": 0, "pages": 0, "rendered": 0, "blank": 0, "seconds": 0.0}
+
+    def iter_blank_pages(self, pdf_paths):
+        """
+        Yield (path, PageSet of blank pages) for every PDF, in the given order.
+
+        Files that cannot be read yield an empty PageSet (the merge reports them itself).
+        """
+        pdf_paths = list(pdf_paths)
+        if self.workers <= 1 or len(pdf_paths) <= 1:
+            for pdf_path in pdf_paths:
+                yield pdf_path, self._record(pdf_path, _find_blank_pages_safely(pdf_path, self.settings))
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(pdf_paths))) as executor:
+            futures = [executor.submit(_find_blank_pages_safely, pdf_path, self.settings) for pdf_path in pdf_paths]
+            try:
+                for pdf_path, future in zip(pdf_paths, futures):
+                    yield pdf_path, self._record(pdf_path, future.result())
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def print_summary(self):
+        stats = self.stats
+        print(f"Blank page check: {stats['blank']} blank of {stats['pages']} pages in {stats['files']} files, "
+              f"{stats['rendered']} rendered, {stats['seconds']:.2f}s of worker time")
+
+    def _record(self, pdf_path, result):
+        blank, stats, error = result
+        self.stats["files"] += 1
+        if error is None:
+            for key in ("pages", "rendered", "seconds"):
+                self.stats[key] += stats[key]
+            self.stats["blank"] += len(blank)
+            if blank:
+                print(f"🗑️ {os.path.basename(pdf_path)}: blank pages {blank}")
+        return blank
+
+def _find_blank_pages_safely(pdf_path, settings):
+    try:
+        blank, stats = find_blank_pages(pdf_path, *settings)
+        return blank, stats, None
+    except Exception as e:
+        return PageSet(), None, f"{type(e).__name__}: {e}"
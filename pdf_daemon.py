@@ -0,0 +1,303 @@
+### Keep the PDF libraries loaded in a background process so small jobs do not pay for start-up ###
+#
+# python pdf_daemon.py start                                   # serve until Ctrl+C (or "stop")
+# python pdf_jobs.py --daemon extract book.pdf ch3.pdf --pages 41-60
+# python pdf_jobs.py --daemon run nightly.yaml
+# python pdf_daemon.py status
+# python pdf_daemon.py stop
+#
+# The daemon imports PyPDF2, PyMuPDF, numpy and PIL once and keeps the most recently parsed
+# source PDFs (pdf_jobs.ReaderCache), so a job sent to it only costs the work itself.
+#
+# Protocol, for tools that talk to the socket directly: one JSON request per connection,
+# written as a single line, answered with a single JSON line.
+#   {"job": {"op": "extract", ...}}        -> {"status": "ok", "output": ..., "log": ..., "seconds": ...}
+#   {"jobs": [...], "workers": 4}          -> {"status": "ok", "results": [...], "log": ..., "seconds": ...}
+#   {"command": "status"} / {"command": "stop"}
+# A failed job answers {"status": "error", "error": "ValueError: ..."}. Paths must be absolute,
+# as the daemon does not share the caller's working folder.
+#
+# Needs Unix domain sockets (Linux, macOS, WSL on Windows). Only the current user can connect.
+
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Default socket: in the user's runtime folder, or a per-user name in /tmp
+DEFAULT_SOCKET = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or "/tmp",
+                              f"pdf-tools-{os.getuid()}.sock" if hasattr(os, "getuid") else "pdf-tools.sock")
+
+# Where the current request's prints are collected (None outside a request)
+_request_log = ContextVar("request_log", default=None)
+
+class DaemonNotRunningError(ConnectionError):
+    """Nothing is listening on the daemon socket."""
+
+class DaemonJobError(Exception):
+    """A job sent to the daemon failed there."""
+
+class PdfDaemon:
+    """
+    Runs pdf_jobs jobs sent over a Unix socket, with the libraries loaded once.
+
+    Source PDFs stay parsed between jobs while they are among the max_readers most recently
+    used (and are parsed again when they change on disk). Requests are served side by side;
+    as in "pdf_jobs.py run", the jobs that use PyMuPDF (not thread-safe) take turns.
+
+    What a request's jobs print, also on the pool threads of a manifest request, is sent
+    back to its client instead of the daemon's console.
+
+    Args:
+        socket_path (str): Socket to listen on (default: DEFAULT_SOCKET)
+        max_readers (int): Parsed source PDFs to keep (default: 32)
+        workers (int): Default number of jobs running at once for manifest requests (default: 4)
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, max_readers=32, workers=4):
+        from pdf_jobs import ReaderCache
+
+        self.socket_path = socket_path
+        self.workers = workers
+        self.readers = ReaderCache(max_readers=max_readers)
+        self.requests = 0
+        self.started = time.time()
+        self._server = None
+        self._stopping = False
+
+    def serve_forever(self, preload=True):
+        """
+        Listen on the socket until stopped with a "stop" request or Ctrl+C.
+
+        Args:
+            preload (bool): Import the PDF libraries before the first request (default: True)
+
+        Raises:
+            RuntimeError: If another daemon is already listening on the socket
+        """
+        import socketserver
+
+        _remove_stale_socket(self.socket_path)
+        if preload:
+            _preload()
+
+        daemon = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.wfile.write(daemon.handle_line(self.rfile.readline()))
+                self.wfile.flush()
+                if daemon._stopping:
+                    daemon._server.shutdown()  # after answering; blocks until serve_forever() returns
+
+        # Created with owner-only permissions, so other users cannot send jobs
+        old_umask = os.umask(0o177)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, RequestHandler)
+        finally:
+            os.umask(old_umask)
+        self._server.daemon_threads = True
+
+        stdout = sys.stdout
+        sys.stdout = _RequestOutput(stdout)  # each request's prints go back to its client
+        print(f"🟢 PDF daemon listening on {self.socket_path} (pid {os.getpid()})")
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sys.stdout = stdout
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            print(f"🔴 PDF daemon stopped after {self.requests} requests")
+
+    def handle_line(self, line):
+        """
+        Answer one request line.
+
+        Args:
+            line (bytes): JSON request
+
+        Returns:
+            bytes: JSON response line
+        """
+        start = time.perf_counter()
+        with _captured() as log:
+            try:
+                response = self._respond(json.loads(line))
+            except Exception as e:
+                response = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        response.update(log=log.getvalue(), seconds=round(time.perf_counter() - start, 4))
+        self.requests += 1
+        return (json.dumps(response, default=str) + "\n").encode("utf-8")
+
+    def _respond(self, request):
+        from pdf_jobs import run_job, run_jobs
+
+        command = request.get("command")
+        if command == "status":
+            return {"status": "ok", "pid": os.getpid(), "uptime": round(time.time() - self.started),
+                    "requests": self.requests, "cached_pdfs": len(self.readers.readers),
+                    "parses": self.readers.parses}
+        if command == "stop":
+            self._stopping = True
+            return {"status": "ok"}
+        if command is not None:
+            raise ValueError(f"Unknown command '{command}', expected status or stop")
+
+        if "jobs" in request:
+            results = run_jobs(request["jobs"], workers=request.get("workers", self.workers), readers=self.readers)
+            return {"status": "ok", "results": results}
+        if "job" in request:
+            return {"status": "ok", "output": run_job(request["job"], self.readers)}
+        raise ValueError("Request needs 'job', 'jobs' or 'command'")
+
+def send_request(request, socket_path=DEFAULT_SOCKET, timeout=None):
+    """
+    Send one request to the daemon and wait for its answer.
+
+    Args:
+        request (dict): {"job": ...}, {"jobs": [...], "workers": n} or {"command": ...}
+        socket_path (str): Daemon socket (default: DEFAULT_SOCKET)
+        timeout (float): Seconds to wait for the answer (default: no limit)
+
+    Returns:
+        dict: The daemon's response
+
+    Raises:
+        DaemonNotRunningError: If no daemon is listening on socket_path
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonNotRunningError("The PDF daemon needs Unix sockets, which Python does not support here")
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        try:
+            client.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            raise DaemonNotRunningError(f"No PDF daemon at {socket_path} "
+                                        "(start one with: python pdf_daemon.py start)") from None
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with client.makefile("rb") as answer:
+            line = answer.readline()
+    if not line:
+        raise ConnectionError("The PDF daemon closed the connection without answering")
+    return json.loads(line)
+
+def send_job(job, socket_path=DEFAULT_SOCKET):
+    """
+    Run one job in the daemon, like pdf_jobs.run_job() but without loading any PDF library here.
+
+    Relative paths in the job are resolved against the current folder, and what the job
+    prints in the daemon is printed here.
+
+    Args:
+        job (dict): {"op": one of pdf_jobs.JOB_OPERATIONS, options of that operation...}
+        socket_path (str): Daemon socket (default: DEFAULT_SOCKET)
+
+    Returns:
+        The operation's output path(s)
+
+    Raises:
+        DaemonNotRunningError: If no daemon is listening on socket_path
+        DaemonJobError: If the job failed in the daemon
+    """
+    from pdf_jobs import JOB_OPERATIONS
+
+    job = dict(job)
+    for key in JOB_OPERATIONS.get(job.get("op"), ()):
+        if isinstance(job.get(key), str):
+            job[key] = os.path.abspath(os.path.expanduser(job[key]))
+
+    response = send_request({"job": job}, socket_path)
+    print(response.get("log", ""), end="")
+    if response["status"] != "ok":
+        raise DaemonJobError(response["error"])
+    return response["output"]
+
+class _RequestOutput:
+    """sys.stdout stand-in that collects the prints made in a request's context for its client."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        return (_request_log.get() or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+@contextmanager
+def _captured():
+    """
+    Collect what is printed in this context while the block runs (only while sys.stdout is a
+    _RequestOutput). Threads started with a copy of the context print into the same log.
+    """
+    from io import StringIO
+
+    log = StringIO()
+    token = _request_log.set(log)
+    try:
+        yield log
+    finally:
+        _request_log.reset(token)
+
+def _preload():
+    """Import the libraries and tool modules now, so the first job does not wait for them."""
+    start = time.perf_counter()
+    import fitz  # noqa: F401
+    import numpy  # noqa: F401
+    import PyPDF2  # noqa: F401
+    from PIL import Image  # noqa: F401
+    import pdf_blank, pdf_finalize, pdf_margin, pdf_merge, pdf_split  # noqa: F401,E401
+    print(f"Libraries loaded in {time.perf_counter() - start:.2f}s")
+
+def _remove_stale_socket(socket_path):
+    """Remove a socket file left behind by a daemon that was killed; refuse if one is still running."""
+    if not os.path.exists(socket_path):
+        return
+    try:
+        send_request({"command": "status"}, socket_path, timeout=2)
+    except (DaemonNotRunningError, OSError, ValueError):
+        os.remove(socket_path)
+        return
+    raise RuntimeError(f"A PDF daemon is already running on {socket_path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the PDF jobs from a process that keeps the libraries loaded.")
+    parser.add_argument("command", choices=("start", "status", "stop"))
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help=f"socket path (default: {DEFAULT_SOCKET})")
+    parser.add_argument("--max-readers", type=int, default=32, help="parsed source PDFs to keep (default: 32)")
+    parser.add_argument("--workers", type=int, default=4, help="jobs of a manifest running at once (default: 4)")
+    args = parser.parse_args(argv)
+
+    if args.command == "start":
+        try:
+            PdfDaemon(args.socket, max_readers=args.max_readers, workers=args.workers).serve_forever()
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 1
+        return 0
+
+    try:
+        response = send_request({"command": args.command}, args.socket, timeout=10)
+    except DaemonNotRunningError as e:
+        print(f"❌ {e}")
+        return 1
+    if args.command == "status":
+        print(f"🟢 PDF daemon (pid {response['pid']}) up {response['uptime']}s: {response['requests']} requests, "
+              f"{response['cached_pdfs']} PDFs cached, {response['parses']} parsed")
+    else:
+        print("🔴 PDF daemon stopping")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+### Final save of a PDF: stream compression, object streams, clean-up, optional fast web view and image recompression ###
+#
+# python pdf_finalize.py book.pdf                       # balanced profile, book.pdf is replaced
+# python pdf_finalize.py book.pdf small.pdf --profile smallest --linearize
+# python pdf_finalize.py book.pdf --compare             # time and size of every profile, nothing is replaced
+#
+# The scripts call finalize_pdf() on their output when finalize_profile is set in their config.
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+# Save options of each profile (PyMuPDF Document.save), plus the JPEG quality used to
+# recompress images (None = leave images as they are)
+#   fast     - drop unused objects, compress uncompressed streams quickly
+#   balanced - also renumber objects compactly and pack them into compressed object streams
+#              (with a cross-reference stream); lossless, time grows with the file size
+#   smallest - also merge duplicate objects, highest compression effort and JPEG recompression
+#              of large images (lossy); the duplicate search gets slow on files with many
+#              thousands of objects (garbage=4, which also compares stream contents, is left out
+#              as it took ~10 minutes on a 600-page book)
+FINALIZE_PROFILES = {
+    "fast": {"save": {"garbage": 1, "deflate": 1, "compression_effort": 1}, "jpeg_quality": None},
+    "balanced": {"save": {"garbage": 2, "deflate": 1, "use_objstms": 1}, "jpeg_quality": None},
+    "smallest": {"save": {"garbage": 3, "deflate": 1, "deflate_images": 1, "deflate_fonts": 1, "use_objstms": 1,
+                          "compression_effort": 100}, "jpeg_quality": 75},
+}
+
+# Images smaller than this (decoded) are not worth recompressing
+MIN_RECOMPRESS_BYTES = 64 * 1024
+
+def finalize_pdf(input_path, output_path=None, profile="balanced", linearize=False, jpeg_quality=None, workers=None):
+    """
+    Save a PDF again with a finalization profile and report the time and size change.
+
+    Args:
+        input_path (str): PDF to finalize
+        output_path (str): Where to save it (default: replace input_path)
+        profile (str): "fast", "balanced" or "smallest" (default: "balanced")
+        linearize (bool): Arrange the file for fast web view; needs pikepdf (default: False)
+        jpeg_quality (int): Recompress large images as JPEG at this quality; False to keep the
+                            images (default: the profile's setting)
+        workers (int): Threads for the image recompression (default: number of CPUs)
+
+    Returns:
+        dict: profile, seconds, size_before, size_after, images_recompressed, linearized
+    """
+    import fitz
+
+    output_path = output_path or input_path
+    start = time.perf_counter()
+    size_before = os.path.getsize(input_path)
+
+    doc = fitz.open(input_path)
+    try:
+        report = save_finalized(doc, output_path, profile, linearize, jpeg_quality, workers)
+    finally:
+        if not doc.is_closed:
+            doc.close()
+
+    report.update(seconds=time.perf_counter() - start, size_before=size_before)
+    _print_report(report)
+    return report
+
+def save_finalized(doc, output_path, profile="balanced", linearize=False, jpeg_quality=None, workers=None):
+    """
+    Save an open PyMuPDF document with a finalization profile.
+
+    For tools that build the output with PyMuPDF, so it is written once instead of saved
+    and then finalized. output_path may be the document's own file, which closes the document.
+
+    Args:
+        doc: Open PyMuPDF document (its images may be replaced when recompressing)
+        output_path (str): Where to save it
+        profile, linearize, jpeg_quality, workers: As for finalize_pdf()
+
+    Returns:
+        dict: profile, size_after, images_recompressed, linearized
+    """
+    if profile not in FINALIZE_PROFILES:
+        raise ValueError(f"Unknown finalize profile '{profile}', expected one of: {', '.join(FINALIZE_PROFILES)}")
+    settings = FINALIZE_PROFILES[profile]
+    if jpeg_quality is None:
+        jpeg_quality = settings["jpeg_quality"]
+
+    images_recompressed = recompress_images(doc, jpeg_quality, workers) if jpeg_quality else 0
+
+    # Always save to a temporary file first: the output may be the file the document was opened from
+    directory = os.path.dirname(os.path.abspath(output_path))
+    handle, temp_path = tempfile.mkstemp(suffix=".pdf", dir=directory)
+    os.close(handle)
+    try:
+        doc.save(temp_path, **settings["save"])
+        linearized = linearize and _linearize(temp_path)
+        if doc.name and os.path.abspath(doc.name) == os.path.abspath(output_path):
+            doc.close()  # the file cannot be replaced while it is open on Windows
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return {"profile": profile, "size_after": os.path.getsize(output_path),
+            "images_recompressed": images_recompressed, "linearized": linearized}
+
+def recompress_images(doc, jpeg_quality=75, workers=None):
+    """
+    Re-encode large losslessly stored images as JPEG, in parallel, where that makes them smaller.
+
+    Only 8-bit gray and RGB images are touched; masks, CMYK, indexed and already JPEG/JPX
+    compressed images are left alone. So are images used as another image's /SMask or /Mask
+    and images that have a soft mask or color-key mask themselves: JPEG artifacts there
+    show as halos or broken transparency. Images are read and replaced on the calling thread
+    (PyMuPDF is not thread-safe); the JPEG encoding runs on a thread pool.
+
+    Args:
+        doc: Open PyMuPDF document
+        jpeg_quality (int): JPEG quality (default: 75)
+        workers (int): Encoder threads (default: number of CPUs)
+
+    Returns:
+        int: Number of images replaced
+    """
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    replaced = 0
+    pending = deque()
+
+    def replace_finished():
+        nonlocal replaced
+        xref, raw_length, future = pending.popleft()
+        jpeg = future.result()
+        if len(jpeg) < raw_length:
+            doc.update_stream(xref, jpeg, compress=0)
+            doc.xref_set_key(xref, "Filter", "/DCTDecode")
+            doc.xref_set_key(xref, "DecodeParms", "null")
+            replaced += 1
+
+    masks = _mask_xrefs(doc)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for xref in range(1, doc.xref_length()):
+            if xref in masks:
+                continue
+            image = _recompressible_image(doc, xref)
+            if image is None:
+                continue
+            samples, mode, size, raw_length = image
+            pending.append((xref, raw_length, executor.submit(_encode_jpeg, samples, mode, size, jpeg_quality)))
+            # Keep memory bounded: only a few decoded images wait for their encoder at a time
+            if len(pending) >= 2 * workers:
+                replace_finished()
+        while pending:
+            replace_finished()
+    return replaced
+
+def compare_profiles(input_path, linearize=False, workers=None):
+    """
+    Finalize a PDF with every profile into temporary files and print the time and size of each.
+
+    Args:
+        input_path (str): PDF to try the profiles on (not changed)
+        linearize (bool): Also linearize (default: False)
+        workers (int): Threads for the image recompression (default: number of CPUs)
+
+    Returns:
+        list: One finalize_pdf() report per profile
+    """
+    reports = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for profile in FINALIZE_PROFILES:
+            reports.append(finalize_pdf(input_path, os.path.join(temp_dir, f"{profile}.pdf"), profile,
+                                        linearize=linearize, workers=workers))
+
+    size_before = os.path.getsize(input_path)
+    print(f"\n{'profile':<10}{'size MB':>10}{'change':>9}{'seconds':>9}{'images':>8}")
+    print(f"{'original':<10}{size_before / 1024 ** 2:>10.2f}{'':>9}{'':>9}{'':>8}")
+    for report in reports:
+        change = report["size_after"] / size_before - 1 if size_before else 0
+        print(f"{report['profile']:<10}{report['size_after'] / 1024 ** 2:>10.2f}{change:>+9.0%}"
+              f"{report['seconds']:>9.2f}{report['images_recompressed']:>8}")
+    return reports
+
+def _mask_xrefs(doc):
+    """Images used as the /SMask or /Mask (stencil) of another image."""
+    masks = set()
+    for xref in range(1, doc.xref_length()):
+        if doc.xref_get_key(xref, "Subtype")[1] != "/Image":
+            continue
+        for key in ("SMask", "Mask"):
+            value = doc.xref_get_key(xref, key)
+            if value[0] == "xref":
+                masks.add(int(value[1].split()[0]))
+    return masks
+
+def _recompressible_image(doc, xref):
+    """(samples, mode, size, stored length) of an image worth recompressing, else None."""
+    if doc.xref_get_key(xref, "Subtype")[1] != "/Image":
+        return None
+    if doc.xref_get_key(xref, "ImageMask")[1] == "true" or doc.xref_get_key(xref, "Decode")[0] != "null":
+        return None
+    # Transparency: a soft mask or color-key mask must keep matching the exact pixels
+    if doc.xref_get_key(xref, "SMask")[0] != "null" or doc.xref_get_key(xref, "Mask")[0] != "null":
+        return None
+    if doc.xref_get_key(xref, "BitsPerComponent")[1] != "8":
+        return None
+    filters = doc.xref_get_key(xref, "Filter")[1]
+    if "DCTDecode" in filters or "JPXDecode" in filters or "JBIG2Decode" in filters:
+        return None
+
+    colorspace = doc.xref_get_key(xref, "ColorSpace")
+    if colorspace[0] == "xref":
+        colorspace = ("array", doc.xref_object(int(colorspace[1].split()[0]), compressed=True))
+    if colorspace[1] in ("/DeviceRGB", "/CalRGB"):
+        mode = "RGB"
+    elif colorspace[1] in ("/DeviceGray", "/CalGray"):
+        mode = "L"
+    else:
+        # ICC profile: its number of components decides
+        icc = re.match(r"\[\s*/ICCBased\s+(\d+)\s+\d+\s+R\s*\]$", colorspace[1])
+        mode = icc and {"3": "RGB", "1": "L"}.get(doc.xref_get_key(int(icc.group(1)), "N")[1])
+    if mode is None:
+        return None
+
+    width = int(doc.xref_get_key(xref, "Width")[1])
+    height = int(doc.xref_get_key(xref, "Height")[1])
+    if width * height * len(mode) < MIN_RECOMPRESS_BYTES:
+        return None
+    samples = doc.xref_stream(xref)
+    if samples is None or len(samples) != width * height * len(mode):
+        return None
+    return samples, mode, (width, height), len(doc.xref_stream_raw(xref))
+
+def _encode_jpeg(samples, mode, size, jpeg_quality):
+    from io import BytesIO
+    from PIL import Image
+
+    output = BytesIO()
+    Image.frombytes(mode, size, samples).save(output, format="JPEG", quality=jpeg_quality, optimize=True)
+    return output.getvalue()
+
+def _linearize(path):
+    """Linearize (fast web view) a saved PDF in place with pikepdf; MuPDF no longer writes linearized files."""
+    try:
+        import pikepdf
+    except ImportError:
+        print("⚠️ Linearization needs pikepdf (pip install pikepdf); saved without it")
+        return False
+
+    linear_path = path + ".linear"
+    with pikepdf.open(path) as pdf:
+        pdf.save(linear_path, linearize=True, object_stream_mode=pikepdf.ObjectStreamMode.preserve)
+    os.replace(linear_path, path)
+    return True
+
+def _print_report(report):
+    size_before, size_after = report["size_before"], report["size_after"]
+    change = size_after / size_before - 1 if size_before else 0
+    line = (f"📦 Finalized ({report['profile']}): {size_before / 1024 ** 2:.2f} MB → "
+            f"{size_after / 1024 ** 2:.2f} MB ({change:+.0%}) in {report['seconds']:.2f}s")
+    if report["images_recompressed"]:
+        line += f", {report['images_recompressed']} images recompressed"
+    if report["linearized"]:
+        line += ", linearized"
+    print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Finalize a PDF: compression, object streams, clean-up.")
+    parser.add_argument("input")
+    parser.add_argument("output", nargs="?", help="output PDF (default: replace the input)")
+    parser.add_argument("--profile", choices=tuple(FINALIZE_PROFILES), default="balanced")
+    parser.add_argument("--linearize", action="store_true", help="fast web view (needs pikepdf)")
+    parser.add_argument("--jpeg-quality", type=int, help="recompress large images as JPEG at this quality")
+    parser.add_argument("--keep-images", action="store_true", help="never recompress images")
+    parser.add_argument("--workers", type=int, help="image recompression threads (default: number of CPUs)")
+    parser.add_argument("--compare", action="store_true", help="try every profile and print the trade-off")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare_profiles(args.input, args.linearize, args.workers)
+        return 0
+    jpeg_quality = False if args.keep_images else args.jpeg_quality
+    finalize_pdf(args.input, args.output, args.profile, args.linearize, jpeg_quality, args.workers)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
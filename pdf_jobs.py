@@ -0,0 +1,429 @@
+### Run the PDF tools without editing them: one job from the command line, or many jobs from a JSON/YAML manifest ###
+#
+# python pdf_jobs.py run nightly.yaml --workers 8
+# python pdf_jobs.py extract book.pdf chapter-3.pdf --pages 41-60
+# python pdf_jobs.py remove book.pdf book-short.pdf --pages 16-31,40-42 --method compact
+# python pdf_jobs.py merge-folder scans/ --skip 2.pdf 10.pdf
+# python pdf_jobs.py margin book.pdf book-margins.pdf --pages 5,15-20 --mode vector
+# python pdf_jobs.py --daemon extract book.pdf chapter-3.pdf --pages 41-60   # run it in pdf_daemon
+#
+# A manifest holds a list of jobs (or {"defaults": {...}, "jobs": [...]}); every job has an
+# "op" and the options of that operation, e.g.
+#
+#   defaults: {dedup: true}
+#   jobs:
+#     - {op: extract, input: book.pdf, output: ch1.pdf, pages: "1-24"}
+#     - {op: split, input: book.pdf, output_dir: chapters, bookmarks: 1}
+#     - {op: merge_folder, folder: scans, skip: ["2.pdf"], finalize: balanced}
+#     - {op: skip_merge, folder: scans, skip: {"1.pdf": [2, 7]}, skip_blank: true}
+#
+# Relative paths are resolved against the manifest's folder. YAML manifests need PyYAML.
+# The PDF libraries are only imported by the operation that needs them, so with --daemon
+# this script stays a thin client.
+
+import argparse
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+
+# op -> keys holding paths (resolved against the manifest folder)
+JOB_OPERATIONS = {
+    "extract": ("input", "output"),
+    "split": ("input", "output_dir", "manifest"),
+    "remove": ("input", "output"),
+    "merge_list": ("folder", "output"),
+    "merge_folder": ("folder", "output"),
+    "skip_merge": ("folder", "output"),
+    "margin": ("input", "output", "bounds_cache"),
+}
+
+# PyMuPDF is not thread-safe: the jobs (and finalize steps) that use it take turns with this lock
+_FITZ_LOCK = threading.Lock()
+
+class ReaderCache:
+    """
+    Parsed PdfReaders shared by the jobs that read the same file.
+
+    A reader is parsed once and kept while it is among the max_readers most recently
+    used files; it is parsed again if the file changes on disk. PdfReader is not
+    thread-safe, so each reader comes with a lock that must be held while reading it.
+
+    Args:
+        max_readers (int): Number of parsed files to keep (default: 16)
+    """
+
+    def __init__(self, max_readers=16):
+        self.max_readers = max_readers
+        self.readers = OrderedDict()
+        self.lock = threading.Lock()
+        self.parses = 0
+
+    def get(self, path):
+        """
+        Return (reader, lock) for a PDF, parsing it on first use.
+
+        Args:
+            path (str): Path of the PDF
+
+        Returns:
+            tuple: (PdfReader, threading.Lock)
+        """
+        from PyPDF2 import PdfReader
+
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+
+        with self.lock:
+            entry = self.readers.get(path)
+            if entry is None or entry[0] != signature:
+                # Placeholder first, so other jobs for this file wait for the parse instead of repeating it
+                entry = (signature, threading.Lock(), [None])
+                self.readers[path] = entry
+            self.readers.move_to_end(path)
+            while len(self.readers) > self.max_readers:
+                self.readers.popitem(last=False)
+
+        _, reader_lock, holder = entry
+        with reader_lock:
+            if holder[0] is None:
+                holder[0] = PdfReader(path)
+                self.parses += 1
+        return holder[0], reader_lock
+
+def load_job_manifest(manifest_path):
+    """
+    Load jobs from a JSON or YAML manifest.
+
+    Args:
+        manifest_path (str): Path of the .json, .yaml or .yml manifest
+
+    Returns:
+        list: Job dicts with defaults applied and paths made absolute
+    """
+    with open(manifest_path, encoding="utf-8") as f:
+        if manifest_path.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("YAML manifests need PyYAML (pip install pyyaml), or use a .json manifest") from None
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    if isinstance(data, list):
+        data = {"jobs": data}
+    defaults = data.get("defaults", {})
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    return [_resolve_paths({**defaults, **job}, base_dir) for job in data.get("jobs", [])]
+
+def run_jobs(jobs, workers=4, readers=None):
+    """
+    Run jobs on a thread pool, sharing parsed readers between jobs on the same file.
+
+    All jobs run in this one process, so there is no interpreter start-up per job, and a
+    source file used by several extract/remove/split jobs is parsed only once. Jobs that
+    fail are reported and do not stop the others.
+
+    The PyPDF2 jobs run side by side. PyMuPDF is not thread-safe, so the jobs that use it
+    (margin, compact/incremental remove, skip_merge with skip_blank) and every finalize
+    step run one at a time.
+
+    Args:
+        jobs (list): Job dicts ({"op": ..., options...})
+        workers (int): Number of jobs running at once (default: 4)
+        readers (ReaderCache): Reader cache to use (default: a new one)
+
+    Returns:
+        list: One result per job, in job order: {"job", "op", "status", "seconds", "output" or "error"}
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    readers = readers or ReaderCache()
+    parses_before = readers.parses
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # Each job runs in a copy of the caller's context, so context-bound state (such as the
+        # output capture of a pdf_daemon request) follows it onto the pool threads
+        futures = [executor.submit(contextvars.copy_context().run, _run_job_safely, index, job, readers)
+                   for index, job in enumerate(jobs)]
+        results = [future.result() for future in futures]
+
+    failed = [result for result in results if result["status"] != "ok"]
+    print(f"\n✅ {len(results) - len(failed)} of {len(results)} jobs done in {time.perf_counter() - start:.2f}s "
+          f"({readers.parses - parses_before} source files parsed)")
+    for result in failed:
+        print(f"❌ Job {result['job'] + 1} ({result['op']}): {result['error']}")
+    return results
+
+def run_job(job, readers=None):
+    """
+    Run one job.
+
+    Any job can have "finalize" (a pdf_finalize profile: "fast", "balanced" or "smallest") and
+    "linearize" to finalize its output(s) once written (incremental merges and removes are
+    left as saved).
+
+    Args:
+        job (dict): {"op": one of JOB_OPERATIONS, options of that operation...}
+        readers (ReaderCache): Shared reader cache (default: parse the sources for this job only)
+
+    Returns:
+        The operation's output path(s)
+
+    Raises:
+        ValueError: If the job is invalid
+    """
+    with _FITZ_LOCK if _uses_fitz(job) else nullcontext():
+        output = _run_operation(job, readers)
+    # The margin tools finalize in their own save. Finalizing rewrites the whole file, so it is
+    # skipped for incremental outputs: a merge that must stay reusable, an incremental remove.
+    if job.get("finalize") and job["op"] != "margin":
+        if job.get("incremental") or job.get("method") == "incremental":
+            print(f"⚠️ Finalize profile '{job['finalize']}' is not used with an incremental {job['op']}")
+        else:
+            from pdf_finalize import finalize_pdf
+
+            with _FITZ_LOCK:
+                for path in output if isinstance(output, list) else [output]:
+                    finalize_pdf(path, profile=job["finalize"], linearize=job.get("linearize", False))
+    return output
+
+def _uses_fitz(job):
+    """Whether the job's operation itself works with PyMuPDF."""
+    op = job.get("op")
+    return (op == "margin" or (op == "remove" and job.get("method", "copy") != "copy")
+            or (op == "skip_merge" and bool(job.get("skip_blank"))))
+
+def _run_operation(job, readers):
+    from page_spec import as_page_set
+    from pdf_merge import merge_folder, merge_list, merge_with_skips
+    from pdf_split import cut_pages, load_split_manifest, outline_ranges, pages_writer, split_pdf
+
+    readers = readers or ReaderCache(max_readers=1)
+    op = job.get("op")
+    if op not in JOB_OPERATIONS:
+        raise ValueError(f"Unknown job op '{op}', expected one of: {', '.join(JOB_OPERATIONS)}")
+    merge_options = {key: job[key] for key in ("streaming", "max_open_files", "dedup") if key in job}
+
+    if op == "remove" and job.get("method", "copy") != "copy":
+        if job["method"] not in ("compact", "incremental"):
+            raise ValueError(f"Unknown remove method '{job['method']}', expected copy, compact or incremental")
+        # Page-tree surgery works on the file itself, not on a shared parsed reader
+        cut_pages(_required(job, "input"), _required(job, "output"), _required(job, "pages"),
+                  incremental=job["method"] == "incremental")
+        return job["output"]
+
+    if op in ("extract", "remove"):
+        reader, lock = readers.get(_required(job, "input"))
+        with lock:
+            if op == "extract":
+                writer, _ = pages_writer(reader, _required(job, "pages"))
+            else:
+                total_pages = len(reader.pages)
+                removed = as_page_set(_required(job, "pages"), total_pages)
+                writer, _ = pages_writer(reader, removed.complement(total_pages))
+        # The pages are cloned into the writer, so it is written without holding the reader
+        with open(_required(job, "output"), "wb") as output_file:
+            writer.write(output_file)
+        return job["output"]
+
+    if op == "split":
+        reader, lock = readers.get(_required(job, "input"))
+        with lock:
+            if job.get("manifest"):
+                ranges = load_split_manifest(job["manifest"])
+            elif job.get("ranges"):
+                ranges = list(job["ranges"].items()) if isinstance(job["ranges"], dict) else job["ranges"]
+            else:
+                ranges = outline_ranges(reader, level=int(job.get("bookmarks", 1)))
+            output_dir = job.get("output_dir") or os.path.dirname(os.path.abspath(job["input"]))
+            return split_pdf(reader, ranges, output_dir, workers=job.get("workers", 2))
+
+    if op == "merge_list":
+        output_path, missing_files = merge_list(_required(job, "folder"), _required(job, "files"),
+                                                job.get("output"), **merge_options)
+        for missing in missing_files:
+            print(f"⚠️ {missing} is missing and was skipped")
+        return output_path
+
+    if op == "merge_folder":
+        return merge_folder(_required(job, "folder"), job.get("output"), skip_list=job.get("skip", ()),
+                            incremental=job.get("incremental", False), **merge_options)
+
+    if op == "skip_merge":
+        blank_filter = None
+        if job.get("skip_blank"):
+            from pdf_blank import BLANK_INK_RATIO, BlankPageFilter
+
+            blank_filter = BlankPageFilter(ink_ratio=job.get("blank_ink_ratio", BLANK_INK_RATIO))
+        output_path, missing_files = merge_with_skips(_required(job, "folder"), _required(job, "skip"),
+                                                      job.get("output"), dedup=job.get("dedup", False),
+                                                      blank_filter=blank_filter)
+        for missing in missing_files:
+            print(f"⚠️ {missing} is missing and was skipped")
+        return output_path
+
+    # op == "margin"
+    from pdf_margin import adjust_pdf_margins
+
+    options = {key: job[key] for key in
+               ("workers", "encoder", "jpeg_quality", "in_place", "dpi", "detect_dpi", "bounds_cache", "linearize")
+               if key in job}
+    if job.get("finalize"):
+        options["finalize"] = job["finalize"]
+    adjust_pdf_margins(_required(job, "input"), _required(job, "output"), job.get("target_margin_cm", 2.0),
+                       pages_to_process=_required(job, "pages"), mode=job.get("mode", "raster"), **options)
+    return job["output"]
+
+def _run_job_safely(index, job, readers):
+    start = time.perf_counter()
+    try:
+        output = run_job(job, readers)
+        result = {"status": "ok", "output": output}
+    except Exception as e:
+        result = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+    return {"job": index, "op": job.get("op"), "seconds": round(time.perf_counter() - start, 3), **result}
+
+def _run_jobs_in_daemon(jobs, workers, socket_path=None):
+    """Run manifest jobs in pdf_daemon and print what they printed there; None if it is not running."""
+    from pdf_daemon import DEFAULT_SOCKET, DaemonNotRunningError, send_request
+
+    try:
+        response = send_request({"jobs": jobs, "workers": workers}, socket_path or DEFAULT_SOCKET)
+    except DaemonNotRunningError as e:
+        print(f"❌ {e}")
+        return None
+    print(response.get("log", ""), end="")
+    if response["status"] != "ok":
+        print(f"❌ {response['error']}")
+        return None
+    return response["results"]
+
+def _required(job, key):
+    if job.get(key) in (None, ""):
+        raise ValueError(f"'{job.get('op')}' job needs '{key}'")
+    return job[key]
+
+def _resolve_paths(job, base_dir):
+    for key in JOB_OPERATIONS.get(job.get("op"), ()):
+        if isinstance(job.get(key), str):
+            job[key] = os.path.join(base_dir, os.path.expanduser(job[key]))
+    return job
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run PDF jobs: extract, split, remove, merge and margin.")
+    parser.add_argument("--daemon", action="store_true", help="send the job(s) to a running pdf_daemon")
+    parser.add_argument("--socket", help="pdf_daemon socket (default: pdf_daemon.DEFAULT_SOCKET)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the jobs of a JSON/YAML manifest")
+    run.add_argument("manifest")
+    run.add_argument("--workers", type=int, default=4, help="jobs running at once (default: 4)")
+    run.add_argument("--results", help="save the job results as JSON")
+
+    finalize_options = argparse.ArgumentParser(add_help=False)
+    finalize_options.add_argument("--finalize", choices=("fast", "balanced", "smallest"),
+                                  help="finalize the output with this pdf_finalize profile")
+    finalize_options.add_argument("--linearize", action="store_true", help="fast web view when finalizing")
+
+    extract = commands.add_parser("extract", parents=[finalize_options], help="save some pages as a new PDF")
+    extract.add_argument("input")
+    extract.add_argument("output")
+    extract.add_argument("--pages", required=True, help='page expression, e.g. "487-528"')
+
+    split = commands.add_parser("split", parents=[finalize_options], help="split into many PDFs by manifest or bookmarks")
+    split.add_argument("input")
+    split.add_argument("output_dir")
+    split.add_argument("--manifest", help="CSV/JSON file of name,pages rows (default: use the bookmarks)")
+    split.add_argument("--bookmarks", type=int, default=1, help="bookmark level to split at (default: 1)")
+
+    remove = commands.add_parser("remove", parents=[finalize_options], help="save a PDF without some pages")
+    remove.add_argument("input")
+    remove.add_argument("output")
+    remove.add_argument("--pages", required=True, help='page expression, e.g. "16-31"')
+    remove.add_argument("--method", choices=("copy", "compact", "incremental"), default="copy",
+                        help="copy the kept pages, or delete the removed ones from the page tree (default: copy)")
+
+    merge_options = argparse.ArgumentParser(add_help=False, parents=[finalize_options])
+    merge_options.add_argument("--output", help="merged PDF (default: <first>-<last>.pdf in the folder)")
+    merge_options.add_argument("--streaming", action="store_true", help="bounded-memory streaming merge")
+    merge_options.add_argument("--dedup", action="store_true", help="store shared resources only once")
+
+    merge_list = commands.add_parser("merge-list", parents=[merge_options], help="merge listed PDFs in order")
+    merge_list.add_argument("folder")
+    merge_list.add_argument("files", nargs="+")
+
+    merge_folder = commands.add_parser("merge-folder", parents=[merge_options], help="merge 1.pdf, 2.pdf, ...")
+    merge_folder.add_argument("folder")
+    merge_folder.add_argument("--skip", nargs="*", default=[], help="file names to leave out")
+    merge_folder.add_argument("--incremental", action="store_true", help="reuse the previous output")
+
+    skip_merge = commands.add_parser("skip-merge", parents=[finalize_options], help="merge PDFs leaving out pages of each")
+    skip_merge.add_argument("folder")
+    skip_merge.add_argument("skip", nargs="+", metavar="FILE=PAGES", help='e.g. 1.pdf=2,7 4.pdf=1-2 (or 3.pdf=)')
+    skip_merge.add_argument("--output")
+    skip_merge.add_argument("--dedup", action="store_true", help="store shared resources only once")
+    skip_merge.add_argument("--skip-blank", action="store_true", help="also leave out blank pages")
+    skip_merge.add_argument("--blank-ink-ratio", type=float, help="ink share below which a page is blank (default: 0.002)")
+
+    margin = commands.add_parser("margin", parents=[finalize_options], help="set the left/right margins of pages")
+    margin.add_argument("input")
+    margin.add_argument("output")
+    margin.add_argument("--pages", required=True, help='page expression, e.g. "5,15-20" or "1-"')
+    margin.add_argument("--target", type=float, default=2.0, dest="target_margin_cm", help="margin in cm")
+    margin.add_argument("--mode", choices=("raster", "vector"), default="raster")
+    margin.add_argument("--workers", type=int, default=1)
+    margin.add_argument("--encoder", default="flate")
+    margin.add_argument("--dpi", type=int, default=300)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        jobs = load_job_manifest(args.manifest)
+        if args.daemon:
+            results = _run_jobs_in_daemon(jobs, args.workers, args.socket)
+            if results is None:
+                return 1
+        else:
+            results = run_jobs(jobs, workers=args.workers)
+        if args.results:
+            with open(args.results, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+        return 0 if all(result["status"] == "ok" for result in results) else 1
+
+    job = {key: value for key, value in vars(args).items()
+           if key not in ("command", "daemon", "socket") and value is not None}
+    job["op"] = args.command.replace("-", "_")
+    if args.command in ("merge-list", "merge-folder"):
+        job["streaming"], job["dedup"] = args.streaming, args.dedup
+    if args.command == "skip-merge":
+        job["skip"] = dict(item.split("=", 1) for item in args.skip)
+    if args.command == "margin" and args.mode == "vector":
+        for key in ("workers", "encoder", "dpi"):
+            job.pop(key)
+
+    try:
+        if args.daemon:
+            from pdf_daemon import DEFAULT_SOCKET, DaemonJobError, send_job
+
+            try:
+                output = send_job(job, args.socket or DEFAULT_SOCKET)
+            except DaemonJobError as e:
+                raise ValueError(str(e)) from None
+        else:
+            output = run_job(job)
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"\n✅ Saved: {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,59 @@
 ## created by Er. Ajay Bhattarai ##
 ### This is useful for the margin control in the pdf, but this reduces the text horizontal spacing, and text width ###
 
-import fitz  # PyMuPDF
 import os
-from PIL import Image
+from collections import namedtuple
 import io
+import time
+import zlib
+from bounds_cache import BoundsCache
+from page_spec import as_page_set, parse_page_spec
+from pdf_finalize import save_finalized
+from pdf_metrics import (
+    NULL_METRICS,
+    ConsoleSink,
+    JsonLinesSink,
+    PageProfiler,
+    PipelineMetrics,
+    SummarySink,
+    new_page_stats,
+    sample_peak_memory,
+    timed,
+)
 
-def adjust_pdf_margins_image_compression(input_path, output_path, target_margin_cm=2.0, pages_to_process=None):
+# Grayscale level below which a pixel counts as ink (content)
+INK_THRESHOLD = 240
+
+# Pages whose left margin is within this distance of the target are left unchanged
+MARGIN_TOLERANCE_CM = 0.2
+
+# Resolution of the quick grayscale render used to measure the margins. At 50 DPI a pixel
+# is 0.5 mm, well inside the 2 mm tolerance; only pages that need resampling are then
+# rendered at the output resolution.
+DETECT_DPI = 50
+
+# Result of the boundary-detection engine. Bounds are inclusive pixel indices;
+# the profiles hold the number of ink pixels per column / per row.
+ContentBounds = namedtuple(
+    'ContentBounds',
+    ['left', 'right', 'top', 'bottom', 'column_profile', 'row_profile']
+)
+
+# Encoders for processed page images:
+#   flate - raw RGB samples, Flate-compressed (lossless)
+#   jpeg  - DCT-compressed RGB, quality set by jpeg_quality
+#   gray  - 8-bit grayscale, Flate-compressed (lossless for black and white pages)
+#   mono  - 1-bit black and white, Flate-compressed (text-only pages)
+#   png   - optimized PNG (the original, slowest encoder)
+PAGE_IMAGE_ENCODERS = ("flate", "jpeg", "gray", "mono", "png")
+
+# An encoded page image ready for insertion, with the time it took to encode
+EncodedImage = namedtuple('EncodedImage', ['encoder', 'data', 'width', 'height', 'encode_seconds'])
+
+def adjust_pdf_margins_image_compression(input_path, output_path, target_margin_cm=2.0, pages_to_process=None,
+                                         workers=1, max_in_flight=None, encoder="flate", jpeg_quality=85,
+                                         in_place=False, metrics=None, dpi=300, detect_dpi=DETECT_DPI,
+                                         bounds_cache=None, finalize=None, linearize=False):
     """
     Adjusts PDF margins by converting pages to images, applying horizontal compression,
     and recreating the PDF. This approach treats the entire page like Photoshop.
@@ -15,8 +62,23 @@ def adjust_pdf_margins_image_compression(input_path, output_path, target_margin_
         input_path (str): Path to input PDF
         output_path (str): Path to output PDF
         target_margin_cm (float): Target margin in centimeters (default: 2.0)
-        pages_to_process (list): List of page numbers to process (1-indexed). If None, no pages are processed.
+        pages_to_process: Pages to process (1-indexed): a page expression like "5,15-20", a PageSet or a list. If None, no pages are processed.
+        workers (int): Number of worker processes for page processing. 1 processes pages in this process (default: 1)
+        max_in_flight (int): Maximum number of pages being processed at once in parallel mode (default: 2 * workers)
+        encoder (str): Image encoder for processed pages, one of PAGE_IMAGE_ENCODERS (default: "flate")
+        jpeg_quality (int): JPEG quality when encoder is "jpeg" (default: 85)
+        in_place (bool): Replace only the processed pages in (a copy of) the input and save incrementally (default: False)
+        metrics: PipelineMetrics that receives per-page stage timings and messages (default: None, no per-page output)
+        dpi (int): Resolution of the images of the processed pages (default: 300)
+        detect_dpi (int): Resolution of the quick render that measures the margins, None to measure at dpi (default: DETECT_DPI)
+        bounds_cache (str): Path of a BoundsCache file, so unchanged pages skip detection on later runs (default: None)
+        finalize (str): Save with this pdf_finalize profile, "fast", "balanced" or "smallest" (default: None)
+        linearize (bool): Linearize the output for fast web view when finalizing (default: False)
     """
+    import fitz
+    
+    if encoder not in PAGE_IMAGE_ENCODERS:
+        raise ValueError(f"Unknown encoder '{encoder}', expected one of: {', '.join(PAGE_IMAGE_ENCODERS)}")
     
     # Convert cm to points (1 cm = 28.35 points)
     target_margin_pt = target_margin_cm * 28.35
@@ -30,105 +92,463 @@ def adjust_pdf_margins_image_compression(input_path, output_path, target_margin_
         print(f"Original PDF copied to: {output_path}")
         return
     
-    # Convert to set for faster lookup (convert to 0-indexed)
-    process_pages_set = set(page - 1 for page in pages_to_process if isinstance(page, int) and page > 0)
+
+    if metrics is None:
+        metrics = NULL_METRICS
     
     try:
         # Open the PDF
-        input_doc = fitz.open(input_path)
+        with metrics.run_stage("open"):
+            input_doc = fitz.open(input_path)
         print(f"Processing PDF: {input_path}")
         print(f"Total pages: {input_doc.page_count}")
-        print(f"Pages to process: {sorted(pages_to_process)}")
+        # Page selection as intervals (1-indexed), clipped to the document
+        process_pages_set = as_page_set(pages_to_process, input_doc.page_count)
+        print(f"Pages to process: {process_pages_set}")
+        print(f"Image encoder: {encoder}" + (f" (quality {jpeg_quality})" if encoder == "jpeg" else ""))
+        if workers > 1:
+            print(f"Parallel mode: {workers} worker processes")
+        
+        # Encoded output size and encode time of all processed pages
+        encoded_pages = 0
+        encoded_bytes = 0
+        encode_seconds = 0.0
+        # Pages (1-indexed) whose original was copied because processing them failed
+        failed_pages = []
         
-        # Create new output document
-        output_doc = fitz.open()
+        # Output document (new document, or the input edited in place)
+        output = PageOutput(input_doc, input_path, output_path, in_place=in_place, finalize=finalize,
+                            linearize=linearize)
         
-        # Process each page
+        # Processed pages come back in page order, from this process or from the worker pool
+        selected_pages = (page - 1 for page in process_pages_set)
+        page_results = iter_processed_pages(
+            input_doc, input_path, selected_pages, target_margin_cm, dpi=dpi,
+            workers=workers, max_in_flight=max_in_flight, encoder=encoder, jpeg_quality=jpeg_quality,
+            metrics=metrics, detect_dpi=detect_dpi, bounds_cache=bounds_cache
+        )
+        
+        # Process each page (progress goes to the metrics sinks; printing here slows down long runs)
         for page_num in range(input_doc.page_count):
-            page = input_doc[page_num]
-            
             # Check if this page should be processed
-            if page_num not in process_pages_set:
-                print(f"Page {page_num + 1}: SKIPPED (not in processing list)")
+            if page_num + 1 not in process_pages_set:
                 # Copy original page without modification
-                output_doc.insert_pdf(input_doc, from_page=page_num, to_page=page_num)
+                output.copy_page(page_num)
+                metrics.add_page(page_num, "copied")
                 continue
             
             # Get page dimensions
-            page_rect = page.rect
+            page_rect = input_doc[page_num].rect
             page_width = page_rect.width
             page_height = page_rect.height
             
-            print(f"Page {page_num + 1}: {page_width:.1f} x {page_height:.1f} pts - PROCESSING...")
+            _, encoded_image, messages, stats = next(page_results)
             
-            try:
-                # Convert page to high-resolution image (like taking a screenshot)
-                dpi = 300  # High resolution for quality
-                mat = fitz.Matrix(dpi/72, dpi/72)  # Scale matrix for DPI
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                
-                # Convert to PIL Image
-                img_data = pix.tobytes("png")
-                original_image = Image.open(io.BytesIO(img_data))
-                
-                print(f"  Original image size: {original_image.size}")
+            if encoded_image is None:
+                output.copy_page(page_num)
+                if _has_error(messages):
+                    _report_failed_page(page_num, messages, metrics, failed_pages)
+                    metrics.add_page(page_num, "failed", stats, messages=messages)
+                else:
+                    metrics.add_page(page_num, "kept", stats, messages=messages)
+                continue
+            
+            # Convert compressed image back to PDF page
+            with timed(stats, "insert"):
+                success = insert_image_as_pdf_page(output.doc, encoded_image, page_width, page_height,
+                                                   page_index=output.new_page_index(page_num), messages=messages)
+            
+            if success:
+                output.replace_page(page_num)
+                encoded_pages += 1
+                encoded_bytes += len(encoded_image.data)
+                encode_seconds += encoded_image.encode_seconds
+                metrics.add_page(page_num, "processed", stats, messages=messages,
+                                 encoded_bytes=len(encoded_image.data))
+            else:
+                messages.append("✗ Failed to insert compressed image, copied original page")
+                output.copy_page(page_num)
+                _report_failed_page(page_num, messages, metrics, failed_pages)
+                metrics.add_page(page_num, "failed", stats, messages=messages)
+        
+        page_results.close()
+        
+        # Save the output document
+        with metrics.run_stage("save"):
+            output.save()
+        output.close()
+        input_doc.close()
+        
+        print(f"\n✓ PDF successfully saved as: {output_path}")
+        print(f"Processed pages now have {target_margin_cm}cm margins on both sides.")
+        if encoded_pages:
+            print(f"Encoded {encoded_pages} page images with '{encoder}': {encoded_bytes / (1024 * 1024):.2f} MB, "
+                  f"{encode_seconds:.2f}s total ({encode_seconds / encoded_pages:.3f}s per page)")
+        if failed_pages:
+            print(f"⚠️ {len(failed_pages)} pages could not be processed, originals kept: {as_page_set(failed_pages)}")
+        metrics.close()
+        
+    except Exception as e:
+        print(f"Error processing PDF: {str(e)}")
+        metrics.close()
+        if 'page_results' in locals():
+            page_results.close()
+        if 'input_doc' in locals():
+            input_doc.close()
+        if 'output' in locals():
+            output.close()
+
+def _has_error(messages):
+    """True if a page's messages report an error (they start with ✗)."""
+    return any(message.startswith("✗") for message in messages)
+
+def _report_failed_page(page_num, messages, metrics, failed_pages):
+    """Remember a failed page, and print its errors when no metrics sink shows the page messages."""
+    failed_pages.append(page_num + 1)
+    if not metrics.sinks:
+        for message in messages:
+            if message.startswith("✗"):
+                print(f"Page {page_num + 1}: {message}")
+
+def process_page(page, target_margin_cm, dpi=300, stats=None, detect_dpi=DETECT_DPI, cache=None):
+    """
+    Render one page, detect its content and apply the horizontal compression.
+    
+    The margins are first measured on a quick low-resolution render. Pages without content
+    and pages whose margins are certainly within tolerance are kept without rendering them
+    at the output resolution.
+    
+    Args:
+        page: PyMuPDF page
+        target_margin_cm: Target margin in cm
+        dpi: Render resolution of the output image (default: 300)
+        stats: Page stats from pdf_metrics.new_page_stats() to time the stages in (default: None)
+        detect_dpi: Resolution of the margin preview render, None to always render at dpi (default: DETECT_DPI)
+        cache: BoundsCache to look up and store the detected bounds (default: None)
+        
+    Returns:
+        tuple: (compressed PIL Image or None to keep the original page, list of progress messages)
+    """
+    import fitz
+    from PIL import Image
+    
+    messages = []
+    page_width = page.rect.width
+    
+    if detect_dpi and detect_dpi < dpi:
+        with timed(stats, "preview"):
+            preview_bounds = _cached_bounds(cache, page, detect_dpi, lambda: detect_page_bounds(page, detect_dpi),
+                                            messages)
+        
+        if preview_bounds is None:
+            messages.append("No content detected, keeping original page")
+            return None, messages
+        
+        pixels_per_cm = detect_dpi / 2.54
+        preview_left_cm = preview_bounds.left / pixels_per_cm
+        preview_right_cm = (len(preview_bounds.column_profile) - preview_bounds.right - 1) / pixels_per_cm
+        
+        # A preview pixel blurs the edge by up to one pixel; only skip when that cannot matter
+        if abs(preview_left_cm - target_margin_cm) < MARGIN_TOLERANCE_CM - 1 / pixels_per_cm:
+            messages.append(f"Current margins: Left={preview_left_cm:.1f}cm, Right={preview_right_cm:.1f}cm")
+            messages.append(f"Margins already close to {target_margin_cm}cm, keeping original page")
+            return None, messages
+    
+    # Convert page to high-resolution image (like taking a screenshot)
+    mat = fitz.Matrix(dpi/72, dpi/72)  # Scale matrix for DPI
+    with timed(stats, "render"):
+        pix = page.get_pixmap(matrix=mat, alpha=False)
+    
+    # Wrap the pixmap samples as a PIL Image without copying or re-encoding them.
+    # The image shares the pixmap's memory, so pix must stay alive until it is closed.
+    original_image = Image.frombuffer(
+        "RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1
+    )
+    
+    messages.append(f"Original image size: {original_image.size}")
+    
+    try:
+        # Detect content boundaries in the image (once; reused for compression)
+        with timed(stats, "detect"):
+            bounds = _cached_bounds(cache, page, dpi, lambda: detect_content_bounds(original_image), messages)
+            content_bounds = detect_content_boundaries(original_image, target_margin_cm, page_width, bounds)
+        
+        if not content_bounds:
+            messages.append("No content detected, keeping original page")
+            return None, messages
+        
+        left_margin_px, right_margin_px, content_width_px = content_bounds
+        
+        # Calculate current margins in cm
+        pixels_per_cm = dpi / 2.54
+        current_left_margin_cm = left_margin_px / pixels_per_cm
+        current_right_margin_cm = right_margin_px / pixels_per_cm
+        
+        messages.append(f"Current margins: Left={current_left_margin_cm:.1f}cm, Right={current_right_margin_cm:.1f}cm")
+        
+        # Check if adjustment is needed
+        if abs(current_left_margin_cm - target_margin_cm) < MARGIN_TOLERANCE_CM:
+            messages.append(f"Margins already close to {target_margin_cm}cm, keeping original page")
+            return None, messages
+        
+        # Apply horizontal compression like Photoshop
+        with timed(stats, "resize"):
+            compressed_image = apply_horizontal_compression_to_image(
+                original_image, target_margin_cm, dpi, bounds, messages
+            )
+        
+        if not compressed_image:
+            messages.append("✗ Compression failed")
+        return compressed_image, messages
+        
+    finally:
+        original_image.close()
+        pix = None
+
+def iter_processed_pages(input_doc, input_path, page_numbers, target_margin_cm, dpi=300,
+                         workers=1, max_in_flight=None, encoder="flate", jpeg_quality=85, metrics=None,
+                         detect_dpi=DETECT_DPI, bounds_cache=None):
+    """
+    Process the given pages and yield the results in page order.
+    
+    With workers > 1 the pages are handed to a process pool. Each worker opens its
+    own copy of the document and returns the encoded page image, and at most
+    max_in_flight pages are submitted at any time to keep memory bounded.
+    
+    Args:
+        input_doc: Open PyMuPDF document (used when workers == 1)
+        input_path: Path of the document (opened by each worker)
+        page_numbers: Page numbers to process in ascending order (0-indexed)
+        target_margin_cm: Target margin in cm
+        dpi: Render resolution (default: 300)
+        workers: Number of worker processes (default: 1)
+        max_in_flight: Maximum number of submitted, unconsumed pages (default: 2 * workers)
+        encoder: Image encoder, one of PAGE_IMAGE_ENCODERS (default: "flate")
+        jpeg_quality: JPEG quality for the "jpeg" encoder (default: 85)
+        metrics: PipelineMetrics deciding whether stages are timed and which pages are profiled (default: None)
+        detect_dpi: Resolution of the margin preview render (default: DETECT_DPI)
+        bounds_cache: Path of a BoundsCache file, opened by this process or by each worker (default: None)
+        
+    Yields:
+        tuple: (page_num, EncodedImage or None to keep the original page, list of progress messages,
+                page stats with the stage timings, or None when metrics are off)
+    """
+    if metrics is None:
+        metrics = NULL_METRICS
+    measure = metrics.enabled
+    
+    if workers <= 1:
+        cache = BoundsCache(bounds_cache) if bounds_cache else None
+        try:
+            for page_num in page_numbers:
+                yield _process_page_safely(input_doc[page_num], page_num, target_margin_cm, dpi, encoder,
+                                           jpeg_quality, measure, metrics.profile_path(page_num), detect_dpi, cache)
+        finally:
+            if cache is not None:
+                cache.close()
+        return
+    
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    
+    if not max_in_flight:
+        max_in_flight = 2 * workers
+    
+    pending = deque()
+    remaining = iter(page_numbers)
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_page_worker,
+                             initargs=(input_path, bounds_cache)) as executor:
+        try:
+            for page_num in remaining:
+                pending.append(executor.submit(_process_page_in_worker, page_num, target_margin_cm, dpi,
+                                               encoder, jpeg_quality, measure, metrics.profile_path(page_num),
+                                               detect_dpi))
+                if len(pending) >= max_in_flight:
+                    break
+            
+            while pending:
+                future = pending.popleft()
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = (None, None, [f"✗ Worker failed: {e}"], None)
                 
-                # Detect content boundaries in the image
-                content_bounds = detect_content_boundaries(original_image, target_margin_cm, page_width)
+                # Keep the pool busy with the next page before handing this one back
+                next_page = next(remaining, None)
+                if next_page is not None:
+                    pending.append(executor.submit(_process_page_in_worker, next_page, target_margin_cm, dpi,
+                                                   encoder, jpeg_quality, measure, metrics.profile_path(next_page),
+                                                   detect_dpi))
                 
-                if not content_bounds:
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+def _process_page_safely(page, page_num, target_margin_cm, dpi, encoder, jpeg_quality, measure=False,
+                         profile_path=None, detect_dpi=DETECT_DPI, cache=None):
+    """Process a page and encode the result, turning any error into a fallback result."""
+    stats = new_page_stats() if measure else None
+    if profile_path:
+        with PageProfiler(profile_path):
+            result = _process_and_encode(page, page_num, target_margin_cm, dpi, encoder, jpeg_quality, stats,
+                                         detect_dpi, cache)
+        result[2].append(f"Profile saved: {profile_path}.prof / .txt")
+    else:
+        result = _process_and_encode(page, page_num, target_margin_cm, dpi, encoder, jpeg_quality, stats,
+                                     detect_dpi, cache)
+    sample_peak_memory(stats)
+    return result + (stats,)
+
+def _process_and_encode(page, page_num, target_margin_cm, dpi, encoder, jpeg_quality, stats, detect_dpi, cache):
+    try:
+        image, messages = process_page(page, target_margin_cm, dpi, stats, detect_dpi, cache)
+        if image is None:
+            return page_num, None, messages
+        try:
+            encoded_image = encode_page_image(image, encoder, jpeg_quality)
+            if stats is not None:
+                stats["stages"]["encode"] = encoded_image.encode_seconds
+            return page_num, encoded_image, messages
+        finally:
+            image.close()
+    except Exception as e:
+        return page_num, None, [f"✗ Error processing page {page_num + 1}: {e}"]
+
+# Document and bounds cache opened once per worker process by _init_page_worker
+_worker_doc = None
+_worker_cache = None
+
+def _init_page_worker(input_path, bounds_cache=None):
+    import fitz
+    global _worker_doc, _worker_cache
+    _worker_doc = fitz.open(input_path)
+    _worker_cache = BoundsCache(bounds_cache) if bounds_cache else None
+
+def _process_page_in_worker(page_num, target_margin_cm, dpi, encoder, jpeg_quality, measure, profile_path,
+                            detect_dpi):
+    return _process_page_safely(_worker_doc[page_num], page_num, target_margin_cm, dpi, encoder, jpeg_quality,
+                                measure, profile_path, detect_dpi, _worker_cache)
+
+def adjust_pdf_margins(input_path, output_path, target_margin_cm=2.0, pages_to_process=None, mode="raster", **options):
+    """
+    Adjusts PDF margins with the selected strategy and reports time and output size.
+    
+    Args:
+        input_path (str): Path to input PDF
+        output_path (str): Path to output PDF
+        target_margin_cm (float): Target margin in centimeters (default: 2.0)
+        pages_to_process: Pages to process (1-indexed): a page expression like "5,15-20", a PageSet or a list. If None, no pages are processed.
+        mode (str): "raster" renders pages to images, "vector" transforms the original page content (default: "raster")
+        **options: Extra options for the raster mode (e.g. workers)
+    """
+    if mode not in MARGIN_MODES:
+        raise ValueError(f"Unknown margin mode '{mode}', expected one of: {', '.join(MARGIN_MODES)}")
+    
+    start_time = time.perf_counter()
+    MARGIN_MODES[mode](input_path, output_path, target_margin_cm, pages_to_process, **options)
+    elapsed = time.perf_counter() - start_time
+    
+    if os.path.exists(output_path):
+        output_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+        print(f"Mode: {mode} | Time: {elapsed:.2f}s | Output size: {output_size_mb:.2f} MB")
+
+def adjust_pdf_margins_vector(input_path, output_path, target_margin_cm=2.0, pages_to_process=None, in_place=False,
+                              finalize=None, linearize=False):
+    """
+    Adjusts PDF margins without rasterizing: each processed page is rebuilt by showing the
+    original page content through a horizontal scaling transform, so text stays selectable.
+    
+    Args:
+        input_path (str): Path to input PDF
+        output_path (str): Path to output PDF
+        target_margin_cm (float): Target margin in centimeters (default: 2.0)
+        pages_to_process: Pages to process (1-indexed): a page expression like "5,15-20", a PageSet or a list. If None, no pages are processed.
+        in_place (bool): Replace only the processed pages in (a copy of) the input and save incrementally (default: False)
+        finalize (str): Save with this pdf_finalize profile, "fast", "balanced" or "smallest" (default: None)
+        linearize (bool): Linearize the output for fast web view when finalizing (default: False)
+    """
+    import fitz
+    
+    # Convert cm to points (1 cm = 28.35 points)
+    target_margin_pt = target_margin_cm * 28.35
+    
+    # If no pages specified, don't process anything
+    if not pages_to_process:
+        print("No pages specified for processing. Copying original PDF...")
+        import shutil
+        shutil.copy2(input_path, output_path)
+        print(f"Original PDF copied to: {output_path}")
+        return
+    
+
+    try:
+        input_doc = fitz.open(input_path)
+        print(f"Processing PDF (vector mode): {input_path}")
+        print(f"Total pages: {input_doc.page_count}")
+        # Page selection as intervals (1-indexed), clipped to the document
+        process_pages_set = as_page_set(pages_to_process, input_doc.page_count)
+        print(f"Pages to process: {process_pages_set}")
+        
+        output = PageOutput(input_doc, input_path, output_path, in_place=in_place, finalize=finalize,
+                            linearize=linearize)
+        
+        for page_num in range(input_doc.page_count):
+            if page_num + 1 not in process_pages_set:
+                print(f"Page {page_num + 1}: SKIPPED (not in processing list)")
+                output.copy_page(page_num)
+                continue
+            
+            page = input_doc[page_num]
+            page_rect = page.rect
+            print(f"Page {page_num + 1}: {page_rect.width:.1f} x {page_rect.height:.1f} pts - PROCESSING...")
+            
+            new_page = None
+            try:
+                content_rect = detect_vector_content_bounds(page)
+                if content_rect is None:
                     print(f"  No content detected, copying original page...")
-                    output_doc.insert_pdf(input_doc, from_page=page_num, to_page=page_num)
+                    output.copy_page(page_num)
                     continue
                 
-                left_margin_px, right_margin_px, content_width_px = content_bounds
-                
-                # Calculate current margins in cm
-                pixels_per_cm = dpi / 2.54
-                current_left_margin_cm = left_margin_px / pixels_per_cm
-                current_right_margin_cm = right_margin_px / pixels_per_cm
-                
+                # Current margins in cm
+                current_left_margin_cm = (content_rect.x0 - page_rect.x0) / 28.35
+                current_right_margin_cm = (page_rect.x1 - content_rect.x1) / 28.35
                 print(f"  Current margins: Left={current_left_margin_cm:.1f}cm, Right={current_right_margin_cm:.1f}cm")
                 
-                # Check if adjustment is needed
                 if abs(current_left_margin_cm - target_margin_cm) < 0.2:  # 2mm tolerance
                     print(f"  Margins already close to {target_margin_cm}cm, copying original...")
-                    output_doc.insert_pdf(input_doc, from_page=page_num, to_page=page_num)
+                    output.copy_page(page_num)
                     continue
                 
-                # Apply horizontal compression like Photoshop
-                compressed_image = apply_horizontal_compression_to_image(
-                    original_image, target_margin_cm, dpi
-                )
+                if page_rect.width - 2 * target_margin_pt <= 0:
+                    print(f"  ✗ Page too narrow for target margins, copying original...")
+                    output.copy_page(page_num)
+                    continue
                 
-                if compressed_image:
-                    # Convert compressed image back to PDF page
-                    success = insert_image_as_pdf_page(output_doc, compressed_image, page_width, page_height)
-                    
-                    if success:
-                        print(f"  ✓ Page {page_num + 1} successfully compressed with {target_margin_cm}cm margins")
-                    else:
-                        print(f"  ✗ Failed to insert compressed image, copying original...")
-                        output_doc.delete_page(-1)  # Remove failed page
-                        output_doc.insert_pdf(input_doc, from_page=page_num, to_page=page_num)
-                else:
-                    print(f"  ✗ Compression failed, copying original...")
-                    output_doc.insert_pdf(input_doc, from_page=page_num, to_page=page_num)
+                # Squeeze the full-height content strip into the area between the target margins
+                source_clip = fitz.Rect(content_rect.x0, page_rect.y0, content_rect.x1, page_rect.y1)
+                target_rect = fitz.Rect(target_margin_pt, 0, page_rect.width - target_margin_pt, page_rect.height)
+                compression_ratio = target_rect.width / source_clip.width
+                print(f"    Applying horizontal compression ratio: {compression_ratio:.3f}")
                 
-                # Clean up
-                pix = None
-                original_image.close()
-                if compressed_image:
-                    compressed_image.close()
+                new_page = output.doc.new_page(output.new_page_index(page_num),
+                                               width=page_rect.width, height=page_rect.height)
+                new_page.show_pdf_page(target_rect, input_doc, page_num, clip=source_clip, keep_proportion=False)
+                output.replace_page(page_num)
+                
+                print(f"  ✓ Page {page_num + 1} successfully compressed with {target_margin_cm}cm margins")
                 
             except Exception as e:
                 print(f"  ✗ Error processing page {page_num + 1}: {e}")
                 print(f"    Copying original page as fallback...")
-                output_doc.insert_pdf(input_doc, from_page=page_num, to_page=page_num)
+                if new_page is not None:
+                    output.discard_page(page_num)
+                output.copy_page(page_num)
         
-        # Save the output document
-        output_doc.save(output_path)
-        output_doc.close()
+        output.save()
+        output.close()
         input_doc.close()
         
         print(f"\n✓ PDF successfully saved as: {output_path}")
@@ -138,10 +558,218 @@ def adjust_pdf_margins_image_compression(input_path, output_path, target_margin_
         print(f"Error processing PDF: {str(e)}")
         if 'input_doc' in locals():
             input_doc.close()
-        if 'output_doc' in locals():
-            output_doc.close()
+        if 'output' in locals():
+            output.close()
+
+class PageOutput:
+    """
+    Output document for the margin tools.
+    
+    By default a new document is built and untouched pages are copied in consecutive
+    ranges, with one insert_pdf call per range instead of one per page. With in_place=True
+    the input (or a copy of it at output_path) is edited directly: only processed pages
+    are replaced and the file is saved incrementally, so the cost depends on the number
+    of edited pages rather than the length of the document.
+    
+    Args:
+        input_doc: Open PyMuPDF input document (source of copied pages)
+        input_path: Path to input PDF
+        output_path: Path to output PDF
+        in_place: Edit the input in place instead of building a new document (default: False)
+        finalize: pdf_finalize profile to save a new document with (default: None, plain save)
+        linearize: Linearize when finalizing (default: False)
+    """
+    
+    def __init__(self, input_doc, input_path, output_path, in_place=False, finalize=None, linearize=False):
+        import fitz
+        
+        self.input_doc = input_doc
+        self.output_path = output_path
+        self.in_place = in_place
+        self.finalize = finalize
+        self.linearize = linearize
+        self.copy_calls = 0
+        self._copy_range = None  # [first, last] page of the pending copy run
+        
+        if in_place:
+            if os.path.abspath(input_path) != os.path.abspath(output_path):
+                import shutil
+                shutil.copy2(input_path, output_path)
+            self.doc = fitz.open(output_path)
+        else:
+            self.doc = fitz.open()
+    
+    def copy_page(self, page_num):
+        """Keep the original page (0-indexed). Consecutive pages are copied as one range."""
+        if self.in_place:
+            return
+        if self._copy_range and self._copy_range[1] == page_num - 1:
+            self._copy_range[1] = page_num
+        else:
+            self._flush_copies()
+            self._copy_range = [page_num, page_num]
+    
+    def new_page_index(self, page_num):
+        """Index at which the replacement for page_num (0-indexed) must be created."""
+        self._flush_copies()
+        return page_num if self.in_place else -1
+    
+    def replace_page(self, page_num):
+        """Finish replacing page_num once its new page has been created."""
+        if self.in_place:
+            self.doc.delete_page(page_num + 1)
+    
+    def discard_page(self, page_num):
+        """Remove a replacement page for page_num that could not be completed."""
+        self.doc.delete_page(self.new_page_index(page_num))
+    
+    def save(self):
+        import fitz
+        
+        self._flush_copies()
+        if not self.in_place:
+            if self.finalize:
+                # One save with the profile's compression instead of a plain save and a second pass
+                report = save_finalized(self.doc, self.output_path, self.finalize, self.linearize)
+                if report["images_recompressed"]:
+                    print(f"Recompressed {report['images_recompressed']} images as JPEG")
+            else:
+                self.doc.save(self.output_path)
+        elif self.doc.can_save_incrementally():
+            if self.finalize:
+                print(f"⚠️ Finalize profile '{self.finalize}' is not used with in_place (incremental save)")
+            self.doc.saveIncr()
+        else:
+            # e.g. damaged files that MuPDF had to repair: fall back to a full rewrite
+            temp_path = self.output_path + ".tmp"
+            self.doc.save(temp_path)
+            self.doc.close()
+            os.replace(temp_path, self.output_path)
+            self.doc = fitz.open(self.output_path)
+        if self.copy_calls:
+            print(f"Copied unchanged pages with {self.copy_calls} range insert(s)")
+    
+    def close(self):
+        self.doc.close()
+    
+    def _flush_copies(self):
+        if self._copy_range:
+            first, last = self._copy_range
+            self.doc.insert_pdf(self.input_doc, from_page=first, to_page=last)
+            self.copy_calls += 1
+            self._copy_range = None
+
+def detect_vector_content_bounds(page):
+    """
+    Detect content boundaries from the page's text, drawing and image bounding boxes.
+    
+    Args:
+        page: PyMuPDF page
+        
+    Returns:
+        fitz.Rect: Union of all content boxes inside the page, or None if the page is empty
+    """
+    import fitz
+    
+    page_rect = page.rect
+    content_rect = fitz.Rect()  # empty
+    
+    # Text blocks
+    for block in page.get_text("blocks"):
+        content_rect |= fitz.Rect(block[:4])
+    
+    # Images
+    for image_info in page.get_image_info():
+        content_rect |= fitz.Rect(image_info["bbox"])
+    
+    # Vector drawings, ignoring white fills without a stroke (page backgrounds)
+    for drawing in page.get_drawings():
+        fill = drawing.get("fill")
+        if drawing.get("color") is None and fill is not None and min(fill) >= INK_THRESHOLD / 255:
+            continue
+        content_rect |= drawing["rect"]
+    
+    content_rect &= page_rect
+    if content_rect.is_empty or content_rect.width <= 0:
+        return None
+    return content_rect
 
-def detect_content_boundaries(image, target_margin_cm, page_width_pt):
+def _cached_bounds(cache, page, dpi, detect, messages):
+    """Content bounds of the page at dpi from the cache, or from detect() (and then stored)."""
+    if cache is None:
+        return detect()
+    
+    key = cache.page_key(page, dpi, INK_THRESHOLD)
+    cached = cache.get(key)
+    if cached is not None:
+        messages.append(f"Content bounds at {dpi} DPI from cache")
+        return ContentBounds(*cached) if cached else None
+    
+    bounds = detect()
+    cache.put(key, bounds)
+    return bounds
+
+def detect_page_bounds(page, dpi=DETECT_DPI, threshold=INK_THRESHOLD):
+    """
+    Render the page in grayscale at a low resolution and detect its content bounds.
+    
+    Args:
+        page: PyMuPDF page
+        dpi: Render resolution (default: DETECT_DPI)
+        threshold: Gray level below which a pixel counts as ink (default: 240)
+        
+    Returns:
+        ContentBounds: Bounds in pixels of the dpi render, or None if the page has no ink
+    """
+    import fitz
+    import numpy as np
+    
+    pix = page.get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72), colorspace=fitz.csGRAY, alpha=False)
+    gray = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+    try:
+        return detect_content_bounds(gray, threshold)
+    finally:
+        del gray
+        pix = None
+
+def detect_content_bounds(image, threshold=INK_THRESHOLD):
+    """
+    Boundary-detection engine working on whole arrays instead of single pixels.
+    
+    The page is thresholded once and reduced to per-column and per-row ink
+    profiles, from which all four content bounds are read.
+    
+    Args:
+        image: PIL Image object or 2D grayscale numpy array
+        threshold: Gray level below which a pixel counts as ink (default: 240)
+        
+    Returns:
+        ContentBounds: (left, right, top, bottom, column_profile, row_profile) or None if the page has no ink
+    """
+    import numpy as np
+    
+    if isinstance(image, np.ndarray):
+        gray = image
+    else:
+        gray = np.asarray(image.convert('L'))
+    
+    # Threshold once, then reduce to ink profiles
+    ink = gray < threshold
+    column_profile = np.count_nonzero(ink, axis=0)
+    row_profile = np.count_nonzero(ink, axis=1)
+    
+    ink_columns = np.flatnonzero(column_profile)
+    if ink_columns.size == 0:
+        return None
+    ink_rows = np.flatnonzero(row_profile)
+    
+    return ContentBounds(
+        int(ink_columns[0]), int(ink_columns[-1]),
+        int(ink_rows[0]), int(ink_rows[-1]),
+        column_profile, row_profile
+    )
+
+def detect_content_boundaries(image, target_margin_cm, page_width_pt, bounds=None):
     """
     Detect content boundaries in the image by finding non-white pixels.
     
@@ -149,40 +777,26 @@ def detect_content_boundaries(image, target_margin_cm, page_width_pt):
         image: PIL Image object
         target_margin_cm: Target margin in cm
         page_width_pt: Page width in points
+        bounds: Precomputed ContentBounds for this image (optional)
         
     Returns:
         tuple: (left_margin_px, right_margin_px, content_width_px) or None
     """
     try:
-        # Convert to grayscale for easier analysis
-        gray_image = image.convert('L')
-        width, height = gray_image.size
-        
-        # Find left boundary (first non-white column)
-        left_boundary = 0
-        for x in range(width):
-            column_pixels = [gray_image.getpixel((x, y)) for y in range(height)]
-            # If any pixel in column is not white-ish (threshold 240)
-            if any(pixel < 240 for pixel in column_pixels):
-                left_boundary = x
-                break
-        
-        # Find right boundary (last non-white column)
-        right_boundary = width - 1
-        for x in range(width - 1, -1, -1):
-            column_pixels = [gray_image.getpixel((x, y)) for y in range(height)]
-            # If any pixel in column is not white-ish (threshold 240)
-            if any(pixel < 240 for pixel in column_pixels):
-                right_boundary = x
-                break
+        if bounds is None:
+            bounds = detect_content_bounds(image)
+        if bounds is None:
+            return None
+        
+        width = len(bounds.column_profile)
         
         # Calculate margins and content width
-        left_margin_px = left_boundary
-        right_margin_px = width - right_boundary - 1
-        content_width_px = right_boundary - left_boundary + 1
+        left_margin_px = bounds.left
+        right_margin_px = width - bounds.right - 1
+        content_width_px = bounds.right - bounds.left + 1
         
         # Validation
-        if content_width_px <= 0 or left_boundary >= right_boundary:
+        if content_width_px <= 0 or bounds.left >= bounds.right:
             return None
             
         return (left_margin_px, right_margin_px, content_width_px)
@@ -191,7 +805,7 @@ def detect_content_boundaries(image, target_margin_cm, page_width_pt):
         print(f"    Content detection error: {e}")
         return None
 
-def apply_horizontal_compression_to_image(image, target_margin_cm, dpi):
+def apply_horizontal_compression_to_image(image, target_margin_cm, dpi, bounds=None, messages=None):
     """
     Apply horizontal compression to the entire image like Photoshop's horizontal scaling.
     
@@ -199,10 +813,16 @@ def apply_horizontal_compression_to_image(image, target_margin_cm, dpi):
         image: PIL Image object
         target_margin_cm: Target margin in cm
         dpi: Image DPI
+        bounds: Precomputed ContentBounds for this image, so detection is not repeated (optional)
+        messages: List that collects progress messages instead of printing them (optional)
         
     Returns:
         PIL Image: Compressed image or None if failed
     """
+    from PIL import Image
+    
+    log = messages.append if messages is not None else lambda message: print(f"    {message}")
+    
     try:
         width, height = image.size
         pixels_per_cm = dpi / 2.54
@@ -212,13 +832,13 @@ def apply_horizontal_compression_to_image(image, target_margin_cm, dpi):
         new_content_width = width - (2 * target_margin_px)
         
         if new_content_width <= 0:
-            print("    Image too narrow for target margins")
+            log("Image too narrow for target margins")
             return None
         
         # Detect current content boundaries
-        content_bounds = detect_content_boundaries(image, target_margin_cm, 0)
+        content_bounds = detect_content_boundaries(image, target_margin_cm, 0, bounds)
         if not content_bounds:
-            print("    Could not detect content for compression")
+            log("Could not detect content for compression")
             return None
         
         left_margin_px, right_margin_px, current_content_width = content_bounds
@@ -226,7 +846,7 @@ def apply_horizontal_compression_to_image(image, target_margin_cm, dpi):
         # Calculate compression ratio
         compression_ratio = new_content_width / current_content_width
         
-        print(f"    Applying horizontal compression ratio: {compression_ratio:.3f}")
+        log(f"Applying horizontal compression ratio: {compression_ratio:.3f}")
         
         # Extract content area
         content_left = left_margin_px
@@ -245,47 +865,115 @@ def apply_horizontal_compression_to_image(image, target_margin_cm, dpi):
         return new_image
         
     except Exception as e:
-        print(f"    Compression error: {e}")
+        log(f"Compression error: {e}")
         return None
 
-def insert_image_as_pdf_page(doc, image, page_width, page_height):
+def encode_page_image(image, encoder="flate", jpeg_quality=85):
     """
-    Insert PIL image as a new PDF page.
+    Encode a PIL image for insertion into the PDF.
     
     Args:
-        doc: PyMuPDF document
         image: PIL Image
+        encoder: One of PAGE_IMAGE_ENCODERS (default: "flate")
+        jpeg_quality: JPEG quality for the "jpeg" encoder (default: 85)
+        
+    Returns:
+        EncodedImage: Encoded image data with its encode time
+    """
+    from PIL import Image
+    
+    start_time = time.perf_counter()
+    
+    if encoder == "jpeg":
+        img_buffer = io.BytesIO()
+        image.convert('RGB').save(img_buffer, format='JPEG', quality=jpeg_quality)
+        data = img_buffer.getvalue()
+    elif encoder == "png":
+        img_buffer = io.BytesIO()
+        image.save(img_buffer, format='PNG', optimize=True)
+        data = img_buffer.getvalue()
+    elif encoder == "gray":
+        data = zlib.compress(image.convert('L').tobytes())
+    elif encoder == "mono":
+        # Plain threshold (no dithering) keeps text edges clean
+        data = zlib.compress(image.convert('L').convert('1', dither=Image.Dither.NONE).tobytes())
+    elif encoder == "flate":
+        data = zlib.compress(image.convert('RGB').tobytes())
+    else:
+        raise ValueError(f"Unknown encoder '{encoder}', expected one of: {', '.join(PAGE_IMAGE_ENCODERS)}")
+    
+    return EncodedImage(encoder, data, image.width, image.height, time.perf_counter() - start_time)
+
+def insert_image_as_pdf_page(doc, image, page_width, page_height, page_index=-1, messages=None):
+    """
+    Insert PIL image as a new PDF page. On failure the new page is removed again.
+    
+    Args:
+        doc: PyMuPDF document
+        image: PIL Image, or EncodedImage produced by encode_page_image
         page_width: Target page width in points
         page_height: Target page height in points
+        page_index: Index at which the new page is inserted (default: -1, append)
+        messages: List that collects error messages instead of printing them (optional)
         
     Returns:
         bool: Success status
     """
+    import fitz
+    
+    new_page = None
     try:
-        # Create new page
-        new_page = doc.new_page(width=page_width, height=page_height)
+        if not isinstance(image, EncodedImage):
+            image = encode_page_image(image)
         
-        # Convert PIL image to bytes
-        img_buffer = io.BytesIO()
-        image.save(img_buffer, format='PNG', optimize=True, quality=95)
-        img_data = img_buffer.getvalue()
+        # Create new page
+        new_page = doc.new_page(page_index, width=page_width, height=page_height)
         
         # Insert image to fill the entire page
         img_rect = fitz.Rect(0, 0, page_width, page_height)
-        new_page.insert_image(img_rect, stream=img_data)
+        
+        if image.encoder in ("jpeg", "png"):
+            new_page.insert_image(img_rect, stream=image.data)
+        else:
+            # Raw Flate samples: write the image XObject directly, without decoding
+            colorspace, bits = {
+                "flate": ("/DeviceRGB", 8),
+                "gray": ("/DeviceGray", 8),
+                "mono": ("/DeviceGray", 1),
+            }[image.encoder]
+            xref = doc.get_new_xref()
+            doc.update_object(xref, f"<< /Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} "
+                                    f"/ColorSpace {colorspace} /BitsPerComponent {bits} >>")
+            doc.update_stream(xref, image.data, compress=0)
+            doc.xref_set_key(xref, "Filter", "/FlateDecode")
+            new_page.insert_image(img_rect, xref=xref)
         
         return True
         
     except Exception as e:
-        print(f"    PDF insertion error: {e}")
+        if messages is None:
+            print(f"    PDF insertion error: {e}")
+        else:
+            messages.append(f"PDF insertion error: {e}")
+        if new_page is not None:
+            doc.delete_page(new_page.number)
         return False
 
-def get_pages_to_process():
+# Margin strategies selectable in adjust_pdf_margins
+MARGIN_MODES = {
+    "raster": adjust_pdf_margins_image_compression,
+    "vector": adjust_pdf_margins_vector,
+}
+
+def get_pages_to_process(page_count=None):
     """
-    Get list of pages to process from user input.
+    Get pages to process from user input.
+    
+    Args:
+        page_count: Number of pages in the input PDF (needed for open ranges like "40-")
     
     Returns:
-        list: List of page numbers to process (1-indexed), or None if no pages specified
+        PageSet: Pages to process (1-indexed), or None if no pages specified
     """
     print("\nPage Selection for Processing:")
     print("=" * 50)
@@ -295,6 +983,8 @@ def get_pages_to_process():
     print("- Single pages: 5,10,25")
     print("- Page ranges: 15-20,35-40")
     print("- Mixed: 5,10,15-20,25,30-35")
+    print("- To the end / from the end: 40-, -1 (last page)")
+    print("- Exclude pages: 1-50,!7")
     print("- Press Enter without input to process NO pages")
     print("=" * 50)
     
@@ -304,34 +994,55 @@ def get_pages_to_process():
         print("No pages specified. No compression will be applied.")
         return None
     
-    pages_to_process = []
-    
     try:
-        parts = user_input.split(',')
-        for part in parts:
-            part = part.strip()
-            if '-' in part:
-                # Handle ranges like "15-20"
-                start, end = map(int, part.split('-'))
-                pages_to_process.extend(range(start, end + 1))
-            else:
-                # Handle single page numbers
-                pages_to_process.append(int(part))
-        
-        # Remove duplicates and sort
-        pages_to_process = sorted(list(set(pages_to_process)))
+        return parse_page_spec(user_input, page_count)
         
-        return pages_to_process
-        
-    except ValueError:
-        print("Error: Invalid input format. No pages will be processed.")
+    except ValueError as e:
+        print(f"Error: {e}. No pages will be processed.")
         return None
 
 def main():
+    import fitz
+    
     # File paths
     input_file = r"C:\Users\ajayb\OneDrive - Tribhuvan University\Desktop\TUTORIAL\FINAL-PRINT.pdf"
     output_file = r"C:\Users\ajayb\OneDrive - Tribhuvan University\Desktop\TUTORIAL\FINAL-CORRECT.pdf"
     
+    # Margin strategy: "raster" (page images) or "vector" (keeps text selectable)
+    margin_mode = "raster"
+    
+    # Number of worker processes for raster mode (1 = process pages one after another)
+    workers = 1
+    
+    # Raster mode image encoder: "flate", "jpeg", "gray", "mono" (text-only pages) or "png"
+    encoder = "flate"
+    jpeg_quality = 85
+    
+    # Raster mode resolution of the processed pages (margins are measured on a quick low-resolution render)
+    output_dpi = 300
+    
+    # Remember detected content bounds between runs (None = off), so trying other target margins is faster
+    bounds_cache = os.path.join(os.path.expanduser("~"), ".pdf_margin_bounds.sqlite")
+    
+    # Replace only the processed pages and save incrementally (fast for large books)
+    in_place = False
+    
+    # Final save of a new output: None (plain), "fast", "balanced" (smaller, lossless) or "smallest" (also
+    # recompresses large images as JPEG); linearize = fast web view for the document server (needs pikepdf)
+    finalize_profile = None
+    linearize = False
+    
+    # Raster mode progress report: a line per page, a stage timing table at the end, and/or a
+    # metrics file with one JSON line per page (None = no file). Fewer reports run slightly faster.
+    show_page_progress = True
+    show_stage_summary = True
+    metrics_file = None  # e.g. output_file + ".metrics.jsonl"
+    # Pages to run under cProfile + tracemalloc, e.g. "12" (reports are saved next to the output)
+    profile_pages = None
+    
+    # Pages to process, e.g. "5,15-20": set this to run without the two questions below (None = ask)
+    pages = None
+    
     # Check if input file exists
     if not os.path.exists(input_file):
         print(f"Error: Input file not found: {input_file}")
@@ -357,7 +1068,10 @@ def main():
     print("✓ Leaves unspecified pages completely unchanged")
     
     # Get pages to process from user
-    pages_to_process = get_pages_to_process()
+    with fitz.open(input_file) as doc:
+        page_count = doc.page_count
+    interactive = pages is None
+    pages_to_process = get_pages_to_process(page_count) if interactive else parse_page_spec(pages, page_count)
     
     if pages_to_process:
         print(f"\nPages selected for compression: {pages_to_process}")
@@ -365,17 +1079,31 @@ def main():
         print("=" * 70)
         
         # Confirm before processing
-        confirm = input("Proceed with compression? (y/n): ").strip().lower()
-        if confirm not in ['y', 'yes']:
-            print("Operation cancelled.")
-            return
+        if interactive:
+            confirm = input("Proceed with compression? (y/n): ").strip().lower()
+            if confirm not in ['y', 'yes']:
+                print("Operation cancelled.")
+                return
     else:
         print("\nNo pages selected. Creating copy of original PDF...")
     
     print("\nStarting processing...")
     
     # Process the PDF
-    adjust_pdf_margins_image_compression(input_file, output_file, target_margin_cm=2.0, pages_to_process=pages_to_process)
+    options = {"in_place": in_place, "finalize": finalize_profile, "linearize": linearize}
+    if margin_mode == "raster":
+        sinks = []
+        if show_page_progress:
+            sinks.append(ConsoleSink())
+        if show_stage_summary:
+            sinks.append(SummarySink())
+        if metrics_file:
+            sinks.append(JsonLinesSink(metrics_file))
+        metrics = PipelineMetrics(sinks, profile_pages=profile_pages, profile_dir=output_dir)
+        options.update(workers=workers, encoder=encoder, jpeg_quality=jpeg_quality, metrics=metrics,
+                       dpi=output_dpi, bounds_cache=bounds_cache)
+    adjust_pdf_margins(input_file, output_file, target_margin_cm=2.0, pages_to_process=pages_to_process,
+                       mode=margin_mode, **options)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
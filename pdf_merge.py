@@ -0,0 +1,673 @@
+### Merging for the folder/list scripts, including a streaming merge with bounded memory for very large merges ###
+
+import contextvars
+import hashlib
+import io
+import json
+import os
+import queue
+import threading
+import time
+from PyPDF2 import PdfMerger, PdfReader
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    StreamObject,
+)
+from page_spec import PageSet, as_page_set
+from pdf_names import merged_output_name, numbered_pdfs
+
+# Object numbers of the catalog and the page tree root in files written by StreamingPdfWriter
+CATALOG_NUMBER = 1
+PAGES_NUMBER = 2
+
+def merge_pdfs(pdf_paths, output_path, streaming=False, max_open_files=8, dedup=False):
+    """
+    Merge PDFs in the given order.
+
+    Args:
+        pdf_paths (list): Paths of the PDFs to merge
+        output_path (str): Path of the merged PDF
+        streaming (bool): Use the bounded-memory streaming merge instead of PdfMerger (default: False)
+        max_open_files (int): Open file handle cap for the streaming merge, output included (default: 8)
+        dedup (bool): Store identical fonts, images and other resources only once (uses the streaming merge)
+    """
+    if streaming or dedup:
+        merge_pdfs_streaming(pdf_paths, output_path, max_open_files=max_open_files, dedup=dedup)
+        return
+
+    merger = PdfMerger()
+    for pdf_path in pdf_paths:
+        merger.append(pdf_path)
+    merger.write(output_path)
+    merger.close()
+
+def merge_pdfs_streaming(inputs, output_path, max_open_files=8, dedup=False):
+    """
+    Merge PDFs while writing each input's objects to the output as soon as it is read.
+
+    Every input is released once its pages are written, so only the xref offsets and the
+    list of page objects stay in memory and peak memory stays roughly flat no matter how
+    many inputs there are. A background thread opens and parses the next inputs ahead of
+    time, keeping at most max_open_files files open (output included).
+
+    Only objects reachable from the kept pages are written, so resources of dropped pages
+    never reach the output. Document-level data such as bookmarks and form fields is not
+    carried over; use merge_pdfs without streaming when those are needed.
+
+    Args:
+        inputs: Paths of the PDFs to merge, or (path, pages) pairs where pages selects the pages
+                to keep (page expression, PageSet or list; None = all pages). May be a generator:
+                it is read in the background as the inputs are opened, so it can still be
+                producing later inputs while the first ones are written.
+        output_path (str): Path of the merged PDF
+        max_open_files (int): Maximum number of open files, output included (default: 8)
+        dedup (bool): Store identical resources (fonts, ICC profiles, images...) only once (default: False)
+
+    Returns:
+        int: Number of pages written
+    """
+    inputs = (item if isinstance(item, tuple) else (item, None) for item in inputs)
+
+    writer = StreamingPdfWriter(output_path, dedup=dedup)
+    try:
+        for pdf_path, pages, reader, error in _open_readers_ahead(inputs, max(1, max_open_files - 1)):
+            if error is not None:
+                print(f"⚠️ Could not read {pdf_path}: {error} (skipped)")
+                continue
+            writer.add_document(reader, pages)
+    finally:
+        writer.close()
+
+    if dedup:
+        stats = writer.dedup_stats
+        print(f"Deduplication: {stats['duplicates']} of {stats['objects']} objects were duplicates, "
+              f"{stats['bytes_saved'] / (1024 * 1024):.2f} MB saved in {stats['seconds']:.2f}s")
+
+    return writer.page_count
+
+def merge_pdfs_incremental(pdf_paths, output_path, manifest_path=None, dedup=False):
+    """
+    Merge PDFs, reusing the previous output when only some of the inputs changed.
+
+    A JSON manifest records each input's size, mtime, content hash, page count and byte
+    offsets in the output. On the next run:
+      - an unchanged input costs one stat call (its hash is only checked when size or
+        mtime differ);
+      - when inputs were only added at the end, they are appended to the existing output
+        as an incremental update;
+      - otherwise the output bytes of the unchanged leading inputs are reused as they are,
+        and only the inputs from the first change on are parsed and written again.
+
+    Args:
+        pdf_paths (list): Paths of the PDFs to merge, in order
+        output_path (str): Path of the merged PDF
+        manifest_path (str): Path of the manifest (default: output_path + ".manifest.json").
+                             If it names another, older output file, that file is moved to output_path first.
+        dedup (bool): Store identical resources only once (default: False)
+
+    Returns:
+        str: What was done: "unchanged", "appended", "partial" or "full"
+    """
+    if manifest_path is None:
+        manifest_path = output_path + ".manifest.json"
+    output_path = os.path.abspath(output_path)
+    manifest = _load_manifest(manifest_path)
+    inputs = [_stat_input(pdf_path) for pdf_path in pdf_paths]
+
+    # The output name may follow the inputs (e.g. "1-40.pdf" -> "1-41.pdf"): keep using the old file
+    if manifest and manifest["output"] != output_path and os.path.exists(manifest["output"]) \
+            and not os.path.exists(output_path):
+        os.replace(manifest["output"], output_path)
+
+    # Count the leading inputs that are unchanged since the manifest was written
+    reused = 0
+    if manifest and manifest["dedup"] == dedup and _output_unchanged(manifest, output_path):
+        for old_entry, entry in zip(manifest["inputs"], inputs):
+            if not _input_unchanged(old_entry, entry):
+                break
+            entry.update({key: old_entry[key] for key in
+                          ("sha256", "page_count", "first_object", "start_offset", "end_offset", "pages")})
+            reused += 1
+    else:
+        manifest = None
+
+    if manifest and reused == len(manifest["inputs"]) == len(inputs):
+        mode = "unchanged"
+        state = manifest
+    else:
+        if manifest and reused == len(manifest["inputs"]):
+            # Only new inputs at the end: append them as an incremental update
+            mode = "appended"
+            resume = {
+                "offsets": [None] * manifest["object_count"],
+                "page_numbers": [number for entry in inputs[:reused] for number in entry["pages"]],
+                "prev_xref": manifest["xref_offset"],
+            }
+            write_path = output_path
+        elif manifest and reused:
+            # Reuse the bytes of the unchanged leading inputs, write the rest again
+            mode = "partial"
+            write_path = output_path + ".tmp"
+            resume = _copy_output_prefix(output_path, write_path, inputs[:reused],
+                                         manifest["inputs"][reused]["first_object"])
+        else:
+            mode = "full"
+            resume = None
+            write_path = output_path
+
+        writer = StreamingPdfWriter(write_path, dedup=dedup, resume=resume)
+        try:
+            new_inputs = [(entry["path"], None) for entry in inputs[reused:]]
+            for entry, (pdf_path, _, reader, error) in zip(inputs[reused:], _open_readers_ahead(new_inputs, 4)):
+                if error is not None:
+                    print(f"⚠️ Could not read {pdf_path}: {error} (skipped)")
+                    segment = {"first_object": writer.object_count, "start_offset": None,
+                               "end_offset": None, "pages": []}
+                else:
+                    segment = writer.add_document(reader)
+                entry.update(segment, sha256=_file_hash(pdf_path), page_count=len(segment["pages"]))
+        finally:
+            writer.close()
+
+        if write_path != output_path:
+            os.replace(write_path, output_path)
+        state = {"object_count": writer.object_count, "xref_offset": writer.xref_offset}
+
+    output_stat = os.stat(output_path)
+    _save_manifest(manifest_path, {
+        "version": 1,
+        "output": output_path,
+        "output_size": output_stat.st_size,
+        "output_mtime_ns": output_stat.st_mtime_ns,
+        "dedup": dedup,
+        "object_count": state["object_count"],
+        "xref_offset": state["xref_offset"],
+        "inputs": inputs,
+    })
+
+    print(f"Incremental merge: {mode} ({reused} of {len(inputs)} inputs reused from the previous output)")
+    return mode
+
+def merge_folder(folder_path, output_path=None, skip_list=(), streaming=False, max_open_files=8, dedup=False,
+                 incremental=False):
+    """
+    Merge the numbered PDFs of a folder in numeric order (what "pdf metge 1-100.py" does).
+
+    Args:
+        folder_path (str): Folder with 1.pdf, 2.pdf, ...
+        output_path (str): Path of the merged PDF (default: "<first>-<last>.pdf" in the folder)
+        skip_list: File names to leave out
+        streaming, max_open_files, dedup: As for merge_pdfs
+        incremental (bool): Reuse the previous output through a manifest in the folder (default: False)
+
+    Returns:
+        str: Path of the merged PDF
+
+    Raises:
+        ValueError: If there is nothing to merge
+    """
+    pdf_files = numbered_pdfs(folder_path, skip_list)
+    if not pdf_files:
+        raise ValueError(f"No PDF files found to merge in {folder_path} (or all skipped)")
+    output_path = output_path or os.path.join(folder_path, merged_output_name(pdf_files))
+
+    pdf_paths = [os.path.join(folder_path, pdf) for pdf in pdf_files]
+    if incremental:
+        merge_pdfs_incremental(pdf_paths, output_path, os.path.join(folder_path, ".merge-manifest.json"),
+                               dedup=dedup)
+    else:
+        merge_pdfs(pdf_paths, output_path, streaming=streaming, max_open_files=max_open_files, dedup=dedup)
+    return output_path
+
+def merge_list(folder_path, pdf_list, output_path=None, streaming=False, max_open_files=8, dedup=False):
+    """
+    Merge the listed PDFs of a folder in list order, skipping missing files (what "pdf merge with list.py" does).
+
+    Args:
+        folder_path (str): Folder of the PDFs
+        pdf_list (list): File names in merge order
+        output_path (str): Path of the merged PDF (default: "<first>-<last>.pdf" in the folder)
+        streaming, max_open_files, dedup: As for merge_pdfs
+
+    Returns:
+        tuple: (path of the merged PDF, list of missing file names)
+
+    Raises:
+        ValueError: If none of the files exist
+    """
+    available_files = [pdf for pdf in pdf_list if os.path.exists(os.path.join(folder_path, pdf))]
+    missing_files = [pdf for pdf in pdf_list if pdf not in available_files]
+    if not available_files:
+        raise ValueError(f"No valid PDF files found to merge in {folder_path}")
+    output_path = output_path or os.path.join(folder_path, merged_output_name(available_files))
+
+    merge_pdfs([os.path.join(folder_path, pdf) for pdf in available_files], output_path,
+               streaming=streaming, max_open_files=max_open_files, dedup=dedup)
+    return output_path, missing_files
+
+def merge_with_skips(folder_path, pdf_skip_dict, output_path=None, dedup=False, blank_filter=None):
+    """
+    Merge PDFs in dictionary order, leaving out pages of each (what "skip and merge pdf.py" does).
+
+    Args:
+        folder_path (str): Folder of the PDFs
+        pdf_skip_dict (dict): File name -> pages to skip (1-based list or page expression)
+        output_path (str): Path of the merged PDF (default: "<first>-<last>.pdf" in the folder)
+        dedup (bool): Use the streaming merge and store shared resources once (default: False)
+        blank_filter: pdf_blank.BlankPageFilter to also leave out blank pages; the files are
+                      checked in parallel while the merge writes the ones already checked (default: None)
+
+    Returns:
+        tuple: (path of the merged PDF, list of missing file names)
+
+    Raises:
+        ValueError: If none of the files exist
+    """
+    from PyPDF2 import PdfWriter
+    from page_spec import exclude_pages
+
+    existing_dict = {k: v for k, v in pdf_skip_dict.items() if os.path.exists(os.path.join(folder_path, k))}
+    missing_files = [k for k in pdf_skip_dict if k not in existing_dict]
+    if not existing_dict:
+        raise ValueError(f"No valid PDF files to process in {folder_path}")
+    output_path = output_path or os.path.join(folder_path, merged_output_name(list(existing_dict)))
+
+    pdf_paths = [os.path.join(folder_path, pdf_name) for pdf_name in existing_dict]
+    if blank_filter is not None:
+        blank_pages = (blank for _, blank in blank_filter.iter_blank_pages(pdf_paths))
+    else:
+        blank_pages = (PageSet() for _ in pdf_paths)
+
+    if dedup:
+        # Streaming merge: copies only what the kept pages use and shares identical resources.
+        # The inputs are produced as the blank page check of each file finishes.
+        # Nothing to skip keeps all pages (None): an empty page expression would select none
+        inputs = ((pdf_path, ",".join(filter(None, (exclude_pages(skip_pages), exclude_pages(blank)))) or None)
+                  for pdf_path, skip_pages, blank in zip(pdf_paths, existing_dict.values(), blank_pages))
+        merge_pdfs_streaming(inputs, output_path, dedup=True)
+    else:
+        writer = PdfWriter()
+        for pdf_path, skip_pages, blank in zip(pdf_paths, existing_dict.values(), blank_pages):
+            reader = PdfReader(pdf_path)
+            total_pages = len(reader.pages)
+            # Pages to skip, limited to the pages this file has
+            skipped = as_page_set(skip_pages or None, total_pages).union(blank.clip(total_pages))
+            for page_num in skipped.complement(total_pages):
+                writer.add_page(reader.pages[page_num - 1])
+        with open(output_path, 'wb') as f:
+            writer.write(f)
+    if blank_filter is not None:
+        blank_filter.print_summary()
+    return output_path, missing_files
+
+class StreamingPdfWriter:
+    """
+    Write a PDF object by object, straight to the output file.
+
+    Objects are copied from each input as soon as add_document is called and are not kept
+    afterwards. Only the byte offset of every object (for the xref table) and the object
+    numbers of the pages (for the page tree) stay in memory until close().
+
+    With dedup=True every copied object (except pages, annotations and form fields) is
+    hashed after renumbering, together with its filter parameters. An object identical
+    to one already written is not written again and all references point to the first
+    copy, so a font or image embedded by many inputs ends up in the output once.
+
+    With resume, writing continues at the end of an existing file written by this class
+    (see merge_pdfs_incremental). resume holds the "offsets" of the objects already in the
+    file and the object numbers of its "page_numbers". If it also holds "prev_xref" (the
+    file's last startxref), close() appends an incremental update; otherwise a complete
+    xref table is written.
+
+    Args:
+        output_path (str): Path of the PDF to write
+        dedup (bool): Share identical objects between and within inputs (default: False)
+        resume (dict): State of an existing file to continue (default: None, new file)
+    """
+
+    def __init__(self, output_path, dedup=False, resume=None):
+        self.output_path = output_path
+        self.dedup = dedup
+        self.dedup_stats = {"objects": 0, "duplicates": 0, "bytes_saved": 0, "seconds": 0.0}
+        self._written_hashes = {}  # content hash -> object number (dedup only)
+        self._copying = set()  # object numbers whose children are being copied
+        self._cyclic = set()  # object numbers referenced from their own children
+        if resume is None:
+            self._file = open(output_path, "wb")
+            self._file.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+            self._offsets = [None]  # byte offset per object number; object 0 is the free-list head
+            self._page_numbers = []  # object numbers of the output pages, in order
+            self._catalog_number = self._reserve_number()
+            self._pages_number = self._reserve_number()
+            self._prev_xref = None
+        else:
+            self._file = open(output_path, "r+b")
+            self._file.seek(0, os.SEEK_END)
+            self._offsets = list(resume["offsets"])
+            self._page_numbers = list(resume["page_numbers"])
+            self._catalog_number = CATALOG_NUMBER
+            self._pages_number = PAGES_NUMBER
+            self._prev_xref = resume.get("prev_xref")
+        self._first_new_number = len(self._offsets)
+
+    @property
+    def page_count(self):
+        return len(self._page_numbers)
+
+    @property
+    def object_count(self):
+        return len(self._offsets)
+
+    def add_document(self, reader, pages=None):
+        """
+        Append pages of a document and everything they reference.
+
+        Args:
+            reader: PdfReader of the input
+            pages: Pages to keep (page expression, PageSet or list, 1-indexed); None = all pages
+
+        Returns:
+            dict: Where the document went in the output: first object number, start and end
+                  byte offsets and the object numbers of its pages
+        """
+        first_number = len(self._offsets)
+        start_offset = self._file.tell()
+        total_pages = len(reader.pages)
+        selection = PageSet.all_pages(total_pages) if pages is None else as_page_set(pages, total_pages)
+
+        # Input (object number, generation) -> output object number, for this input only
+        translated = {}
+
+        # Number the kept pages first, so links between them resolve to the new pages
+        kept_pages = []
+        for page_num in selection:
+            page = reader.pages[page_num - 1]
+            number = self._reserve_number()
+            if page.indirect_reference is not None:
+                translated[(page.indirect_reference.idnum, page.indirect_reference.generation)] = number
+            kept_pages.append((number, page))
+            self._page_numbers.append(number)
+
+        for number, page in kept_pages:
+            # Flattened pages already carry their inherited attributes; drop the old parent
+            new_page = DictionaryObject()
+            for key, value in page.items():
+                if key == "/Parent":
+                    continue
+                new_page[NameObject(key)] = self._translate(value, translated)
+            new_page[NameObject("/Parent")] = IndirectObject(self._pages_number, 0, None)
+            self._write_object(number, new_page)
+
+        return {
+            "first_object": first_number,
+            "start_offset": start_offset,
+            "end_offset": self._file.tell(),
+            "pages": [number for number, _ in kept_pages],
+        }
+
+    def close(self):
+        """Write the page tree, catalog, xref table and trailer, then close the file."""
+        if self._file.closed:
+            return
+
+        kids = ArrayObject(IndirectObject(number, 0, None) for number in self._page_numbers)
+        pages_root = DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): kids,
+            NameObject("/Count"): NumberObject(len(self._page_numbers)),
+        })
+        self._write_object(self._pages_number, pages_root)
+
+        if self._prev_xref is None:
+            catalog = DictionaryObject({
+                NameObject("/Type"): NameObject("/Catalog"),
+                NameObject("/Pages"): IndirectObject(self._pages_number, 0, None),
+            })
+            self._write_object(self._catalog_number, catalog)
+            # One complete section
+            sections = [(0, len(self._offsets))]
+            prev = ""
+        else:
+            # Incremental update: the new page tree root and the objects added since resuming
+            sections = [(self._pages_number, 1), (self._first_new_number, len(self._offsets) - self._first_new_number)]
+            prev = f" /Prev {self._prev_xref}"
+
+        self.xref_offset = self._file.tell()
+        self._file.write(b"xref\n")
+        for first, count in sections:
+            if count <= 0:
+                continue
+            self._file.write(f"{first} {count}\n".encode())
+            for offset in self._offsets[first:first + count]:
+                # Object 0 and numbers reserved for objects never written (e.g. duplicates) are free
+                if offset is None:
+                    self._file.write(b"0000000000 65535 f \n")
+                else:
+                    self._file.write(b"%010d 00000 n \n" % offset)
+        self._file.write(
+            f"trailer\n<< /Size {len(self._offsets)} /Root {self._catalog_number} 0 R{prev} >>\n"
+            f"startxref\n{self.xref_offset}\n%%EOF\n".encode()
+        )
+        self._file.close()
+
+    def _reserve_number(self):
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _write_object(self, number, obj):
+        self._write_data(number, self._serialize(obj))
+
+    def _write_data(self, number, data):
+        self._offsets[number] = self._file.tell()
+        self._file.write(b"%d 0 obj\n" % number)
+        self._file.write(data)
+        self._file.write(b"\nendobj\n")
+
+    @staticmethod
+    def _serialize(obj):
+        buffer = io.BytesIO()
+        obj.write_to_stream(buffer, None)
+        return buffer.getvalue()
+
+    def _copy_object(self, reference, translated):
+        """Write the object behind an input reference (once) and return its output reference."""
+        key = (reference.idnum, reference.generation)
+        number = translated.get(key)
+        if number is not None:
+            if number in self._copying:
+                self._cyclic.add(number)
+            return IndirectObject(number, 0, None)
+
+        obj = reference.get_object()
+        if isinstance(obj, DictionaryObject) and obj.get("/Type") == "/Page":
+            # A page that is not part of the output (e.g. a link target in a skipped page)
+            return NullObject()
+
+        # Number the object before copying its children, so reference cycles end here
+        number = self._reserve_number()
+        translated[key] = number
+        self._copying.add(number)
+        try:
+            data = self._serialize(self._translate(obj, translated))
+        finally:
+            self._copying.discard(number)
+
+        if self.dedup and number not in self._cyclic and _can_share(obj):
+            start_time = time.perf_counter()
+            digest = hashlib.blake2b(data, digest_size=20).digest()
+            shared_number = self._written_hashes.get(digest)
+            if shared_number is None:
+                self._written_hashes[digest] = number
+            self.dedup_stats["objects"] += 1
+            self.dedup_stats["seconds"] += time.perf_counter() - start_time
+
+            if shared_number is not None:
+                # Identical object already in the output: point to it, leave this number unused
+                self.dedup_stats["duplicates"] += 1
+                self.dedup_stats["bytes_saved"] += len(data)
+                translated[key] = shared_number
+                return IndirectObject(shared_number, 0, None)
+
+        self._cyclic.discard(number)
+        self._write_data(number, data)
+        return IndirectObject(number, 0, None)
+
+    def _translate(self, value, translated):
+        """Copy a direct object, renumbering the references inside it."""
+        if isinstance(value, IndirectObject):
+            return self._copy_object(value, translated)
+        if isinstance(value, StreamObject):
+            new_stream = value.__class__()
+            new_stream._data = value._data
+            for key, item in value.items():
+                if key != "/Length":
+                    new_stream[NameObject(key)] = self._translate(item, translated)
+            return new_stream
+        if isinstance(value, DictionaryObject):
+            return DictionaryObject(
+                (NameObject(key), self._translate(item, translated)) for key, item in value.items()
+            )
+        if isinstance(value, ArrayObject):
+            return ArrayObject(self._translate(item, translated) for item in value)
+        return value
+
+def _stat_input(pdf_path):
+    stat = os.stat(pdf_path)
+    return {"path": os.path.abspath(pdf_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def _input_unchanged(old_entry, entry):
+    """Same file at the same position with the same content; only hashes when the stat differs."""
+    if old_entry["path"] != entry["path"] or old_entry["size"] != entry["size"] or old_entry["start_offset"] is None:
+        return False
+    if old_entry["mtime_ns"] == entry["mtime_ns"]:
+        return True
+    return _file_hash(entry["path"]) == old_entry["sha256"]
+
+def _output_unchanged(manifest, output_path):
+    if not os.path.exists(output_path):
+        return False
+    stat = os.stat(output_path)
+    return stat.st_size == manifest["output_size"] and stat.st_mtime_ns == manifest["output_mtime_ns"]
+
+def _file_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _load_manifest(manifest_path):
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == 1 else None
+
+def _save_manifest(manifest_path, manifest):
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, manifest_path)
+
+def _copy_output_prefix(output_path, prefix_path, reused_inputs, object_count):
+    """
+    Copy the bytes of the reused leading inputs of a previous output to prefix_path and
+    return the StreamingPdfWriter resume state for continuing after them.
+    """
+    end_offset = max(entry["end_offset"] for entry in reused_inputs if entry["end_offset"] is not None)
+
+    # Object offsets come from the old xref table only; no object is parsed
+    with open(output_path, "rb") as stream:
+        xref = PdfReader(stream).xref.get(0, {})
+        offsets = [None] * object_count
+        for number, offset in xref.items():
+            if number < object_count and number not in (CATALOG_NUMBER, PAGES_NUMBER) and offset < end_offset:
+                offsets[number] = offset
+
+        stream.seek(0)
+        with open(prefix_path, "wb") as prefix:
+            remaining = end_offset
+            while remaining:
+                chunk = stream.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    break
+                prefix.write(chunk)
+                remaining -= len(chunk)
+
+    return {
+        "offsets": offsets,
+        "page_numbers": [number for entry in reused_inputs for number in entry["pages"]],
+    }
+
+def _can_share(obj):
+    """Objects with their own identity (annotations, form fields) must not be merged with look-alikes."""
+    if isinstance(obj, DictionaryObject) and not isinstance(obj, StreamObject):
+        return "/P" not in obj and "/Parent" not in obj and obj.get("/Type") != "/Annot"
+    return True
+
+def _open_readers_ahead(inputs, max_open):
+    """
+    Yield (path, pages, reader, error) for every input in order. A background thread opens
+    and parses the next inputs while the current one is written, with at most max_open
+    input files open at once. Each input is closed when the caller asks for the next one.
+    """
+    handles = threading.BoundedSemaphore(max_open)
+    opened = queue.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def open_inputs():
+        for pdf_path, pages in inputs:
+            handles.acquire()
+            if stop.is_set():
+                handles.release()
+                break
+            try:
+                # Read from the open file instead of loading the whole file into memory
+                stream = open(pdf_path, "rb")
+                try:
+                    reader = PdfReader(stream)
+                except Exception:
+                    stream.close()
+                    raise
+                opened.put((pdf_path, pages, reader, None))
+            except Exception as e:
+                handles.release()
+                opened.put((pdf_path, pages, None, e))
+        opened.put(done)
+
+    # In the caller's context, so what the inputs' generator prints goes where the caller's prints go
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(open_inputs,), daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = opened.get()
+            if item is done:
+                break
+            try:
+                yield item
+            finally:
+                if item[2] is not None:
+                    item[2].stream.close()
+                    handles.release()
+    finally:
+        # Stopped early (e.g. on error): close whatever was opened ahead of time
+        stop.set()
+        while True:
+            try:
+                item = opened.get(timeout=0.1)
+            except queue.Empty:
+                if thread.is_alive():
+                    continue
+                break
+            if item is done:
+                break
+            if item[2] is not None:
+                item[2].stream.close()
+                handles.release()
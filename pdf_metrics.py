@@ -0,0 +1,315 @@
+### Per-page, per-stage timing and memory measurements for the page pipelines (pdf_margin.py) ###
+
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process in MB, or None where it cannot be measured.
+
+    Returns:
+        float: Peak RSS in MB (None if neither /proc, resource nor psutil is available)
+    """
+    # On Linux ru_maxrss survives exec, so it could report a parent process's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    except (ImportError, AttributeError):
+        return None
+
+def new_page_stats():
+    """Empty stats for one page: stage timings filled in by timed(), peak memory by sample_peak_memory()."""
+    return {"stages": {}, "peak_rss_mb": None}
+
+def sample_peak_memory(stats):
+    """Store the peak RSS of the process that handled the page (a worker or this process)."""
+    if stats is not None:
+        stats["peak_rss_mb"] = peak_rss_mb()
+
+class _StageTimer:
+    """Adds the time spent inside the with-block to stages[name]."""
+
+    __slots__ = ("stages", "name", "start")
+
+    def __init__(self, stages, name):
+        self.stages = stages
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stages[self.name] = self.stages.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+def timed(stats, name):
+    """
+    Time a block as one stage of a page.
+
+    Args:
+        stats (dict): Page stats from new_page_stats(), or None when measuring is off
+        name (str): Stage name, e.g. "render" (repeated stages add up)
+
+    Returns:
+        A context manager; a shared no-op one when stats is None
+    """
+    if stats is None:
+        return _NULL_TIMER
+    return _StageTimer(stats["stages"], name)
+
+class PageProfiler:
+    """
+    Run a block under cProfile and tracemalloc and save both reports.
+
+    Writes <path_prefix>.prof (open with pstats or snakeviz) and <path_prefix>.txt with
+    the top CPU functions and the lines that allocated the most memory.
+
+    Args:
+        path_prefix (str): Output path without extension
+        top (int): Number of functions / allocation sites in the text report (default: 25)
+    """
+
+    def __init__(self, path_prefix, top=25):
+        self.path_prefix = path_prefix
+        self.top = top
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self):
+        self.started_tracemalloc = not tracemalloc.is_tracing()
+        if self.started_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        import io
+        import pstats
+
+        self.profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+
+        self.profiler.dump_stats(self.path_prefix + ".prof")
+        report = io.StringIO()
+        pstats.Stats(self.profiler, stream=report).sort_stats("cumulative").print_stats(self.top)
+        report.write(f"\nPython allocation peak: {peak_bytes / (1024 * 1024):.1f} MB\n")
+        report.write(f"Top {self.top} allocation sites still held at the end of the page:\n")
+        for stat in snapshot.statistics("lineno")[:self.top]:
+            report.write(f"{stat}\n")
+        with open(self.path_prefix + ".txt", "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+        return False
+
+class PipelineMetrics:
+    """
+    Collects per-page stage timings and memory samples and hands them to sinks.
+
+    Where a page is processed (possibly in a worker process) its stages are timed into a
+    plain dict from new_page_stats(), which pickles back cheaply; add_page() in the main
+    process turns it into a record for the sinks. Document-level stages such as the final
+    save are timed with run_stage().
+
+    Without sinks and profile pages the object is disabled (enabled is False): the pipeline
+    then passes None instead of page stats, timed() returns a shared no-op context manager
+    and add_page() returns at once.
+
+    Page record (dict): page (1-indexed), status ("processed", "kept", "failed", "copied"),
+    stages {name: seconds}, seconds (sum of stages), peak_rss_mb, plus extra details such
+    as encoded_bytes and messages.
+
+    Args:
+        sinks: Objects with page(record) and close(summary) methods, or plain callables
+               that receive each page record (default: none)
+        profile_pages: Pages (1-indexed, page expression, PageSet or list) to run under
+                       cProfile and tracemalloc (default: None)
+        profile_dir (str): Folder for the profile reports (default: current folder)
+    """
+
+    def __init__(self, sinks=(), profile_pages=None, profile_dir="."):
+        from page_spec import as_page_set
+
+        self.sinks = [CallbackSink(sink) if callable(sink) and not hasattr(sink, "page") else sink
+                      for sink in sinks]
+        self.profile_pages = as_page_set(profile_pages)
+        self.profile_dir = profile_dir
+        self.enabled = bool(self.sinks) or bool(self.profile_pages)
+
+        self.start_time = time.perf_counter()
+        self.stage_totals = {}
+        self.stage_max = {}
+        self.run_stages = {}
+        self.status_counts = {}
+        self.slowest_page = None
+
+    def profile_path(self, page_num):
+        """Report path prefix if this page (0-indexed) is to be profiled, else None."""
+        if page_num + 1 not in self.profile_pages:
+            return None
+        return os.path.join(self.profile_dir, f"page-{page_num + 1}-profile")
+
+    def run_stage(self, name):
+        """Time a document-level stage (opening, saving...)."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self.run_stages, name)
+
+    def add_page(self, page_num, status, stats=None, **details):
+        """
+        Record one finished page and pass it to the sinks.
+
+        Args:
+            page_num (int): Page number (0-indexed)
+            status (str): "processed", "kept", "failed" or "copied"
+            stats (dict): Page stats from new_page_stats() (may come from a worker process)
+            **details: Extra fields for the record (encoded_bytes, messages, ...)
+        """
+        if not self.enabled:
+            return
+
+        stages = stats["stages"] if stats else {}
+        record = {"page": page_num + 1, "status": status, "stages": stages,
+                  "seconds": sum(stages.values()),
+                  "peak_rss_mb": stats["peak_rss_mb"] if stats else None}
+        record.update(details)
+
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        for name, seconds in stages.items():
+            self.stage_totals[name] = self.stage_totals.get(name, 0.0) + seconds
+            self.stage_max[name] = max(self.stage_max.get(name, 0.0), seconds)
+        if stages and (self.slowest_page is None or record["seconds"] > self.slowest_page[1]):
+            self.slowest_page = (record["page"], record["seconds"])
+
+        for sink in self.sinks:
+            sink.page(record)
+
+    def summary(self):
+        """Totals of the run so far."""
+        return {
+            "wall_seconds": time.perf_counter() - self.start_time,
+            "pages": self.status_counts,
+            "stages": {name: {"total_seconds": total, "max_seconds": self.stage_max[name]}
+                       for name, total in self.stage_totals.items()},
+            "run_stages": self.run_stages,
+            "slowest_page": self.slowest_page,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def close(self):
+        """Send the summary to the sinks and close them."""
+        if not self.enabled:
+            return
+        summary = self.summary()
+        for sink in self.sinks:
+            sink.close(summary)
+
+# Measuring turned off
+NULL_METRICS = PipelineMetrics()
+
+class CallbackSink:
+    """Calls callback(record) for every page (and on_close(summary) at the end, if given)."""
+
+    def __init__(self, callback, on_close=None):
+        self.callback = callback
+        self.on_close = on_close
+
+    def page(self, record):
+        self.callback(record)
+
+    def close(self, summary):
+        if self.on_close:
+            self.on_close(summary)
+
+class JsonLinesSink:
+    """Writes one JSON object per page to a .jsonl file, then one {"summary": ...} line."""
+
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def page(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self, summary):
+        self.file.write(json.dumps({"summary": summary}) + "\n")
+        self.file.close()
+
+class ConsoleSink:
+    """Prints one progress line per page with its messages (what the scripts used to print)."""
+
+    def __init__(self, show_copied=False):
+        self.show_copied = show_copied
+
+    def page(self, record):
+        if record["status"] == "copied" and not self.show_copied:
+            return
+        line = f"Page {record['page']}: {record['status']}"
+        if record["stages"]:
+            line += f" in {record['seconds']:.2f}s"
+        if record.get("encoded_bytes"):
+            line += f", {record['encoded_bytes'] / 1024:.1f} KB"
+        print(line)
+        for message in record.get("messages", ()):
+            print(f"  {message}")
+
+    def close(self, summary):
+        pass
+
+class SummarySink:
+    """Prints a table of the time spent per stage when the run ends."""
+
+    def page(self, record):
+        pass
+
+    def close(self, summary):
+        stages = summary["stages"]
+        total = sum(stage["total_seconds"] for stage in stages.values()) + sum(summary["run_stages"].values())
+        pages = summary["pages"]
+
+        print("\nStage timings")
+        print(f"{'stage':<12}{'total s':>10}{'share':>8}{'max ms':>10}")
+        for name, stage in sorted(stages.items(), key=lambda item: -item[1]["total_seconds"]):
+            share = stage["total_seconds"] / total if total else 0
+            print(f"{name:<12}{stage['total_seconds']:>10.2f}{share:>8.0%}{stage['max_seconds'] * 1000:>10.0f}")
+        for name, seconds in summary["run_stages"].items():
+            share = seconds / total if total else 0
+            print(f"{name:<12}{seconds:>10.2f}{share:>8.0%}{'':>10}")
+
+        print("Pages: " + ", ".join(f"{count} {status}" for status, count in pages.items()))
+        if summary["slowest_page"]:
+            print(f"Slowest page: {summary['slowest_page'][0]} ({summary['slowest_page'][1]:.2f}s)")
+        line = f"Wall time: {summary['wall_seconds']:.2f}s"
+        if summary["peak_rss_mb"] is not None:
+            line += f" | Peak memory: {summary['peak_rss_mb']:.0f} MB"
+        print(line)
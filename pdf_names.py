@@ -0,0 +1,29 @@
+### File names of the numbered scans (1.pdf, 2.pdf, ...) and of their merged output, shared by the merge scripts and the watcher ###
+
+import os
+
+def numbered_pdfs(folder_path, skip_list=()):
+    """
+    Numbered PDFs of a folder (1.pdf, 2.pdf, ...) in numeric order.
+
+    Other PDFs, such as earlier merged outputs named "1-40.pdf", are ignored.
+
+    Args:
+        folder_path (str): Folder to list
+        skip_list: File names to leave out (with extension)
+
+    Returns:
+        list: File names
+    """
+    skip_list = set(skip_list)
+    return sorted(
+        [f for f in os.listdir(folder_path)
+         if f.endswith('.pdf') and os.path.splitext(f)[0].isdigit() and f not in skip_list],
+        key=lambda x: int(os.path.splitext(x)[0])
+    )
+
+def merged_output_name(pdf_names):
+    """Output file name made of the first and last input names, e.g. ["1.pdf", ..., "40.pdf"] -> "1-40.pdf"."""
+    first_name = os.path.splitext(os.path.basename(pdf_names[0]))[0]
+    last_name = os.path.splitext(os.path.basename(pdf_names[-1]))[0]
+    return f'{first_name}-{last_name}.pdf'
@@ -0,0 +1,299 @@
+### Split one PDF into many files in a single pass: ranges come from a CSV/JSON manifest or the PDF's bookmarks ###
+
+import csv
+import json
+import os
+import re
+from page_spec import as_page_set
+
+def load_split_manifest(manifest_path):
+    """
+    Load the named page ranges to split out of a PDF.
+
+    CSV files hold one "name,pages" row per output (a header row "name,pages" is optional).
+    JSON files hold either a list of {"name": ..., "pages": ...} objects or a {name: pages} mapping.
+    Pages are page expressions like "1-20" or "5,9-12".
+
+    Args:
+        manifest_path (str): Path to the .csv or .json manifest
+
+    Returns:
+        list: (name, pages) pairs in manifest order
+    """
+    if manifest_path.lower().endswith('.json'):
+        with open(manifest_path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return [(str(name), pages) for name, pages in data.items()]
+        return [(str(item["name"]), item["pages"]) for item in data]
+
+    ranges = []
+    with open(manifest_path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].strip().startswith('#'):
+                continue
+            name, pages = row[0].strip(), ",".join(row[1:]).strip()
+            if (name.lower(), pages.lower()) == ("name", "pages"):
+                continue  # header
+            ranges.append((name, pages))
+    return ranges
+
+def outline_ranges(reader, level=1):
+    """
+    Build named page ranges from the PDF's own bookmarks (outline).
+
+    Each bookmark at the given level runs from its page to the page before the next
+    bookmark of that level; the last one runs to the end of the document.
+
+    Args:
+        reader: PdfReader of the source PDF
+        level (int): Outline depth to split at, 1 = top-level bookmarks (default: 1)
+
+    Returns:
+        list: (name, "first-last") pairs in document order
+    """
+    entries = []
+
+    def collect(items, depth):
+        for item in items:
+            if isinstance(item, list):
+                if depth < level:
+                    collect(item, depth + 1)
+            elif depth == level:
+                page_index = reader.get_destination_page_number(item)
+                if page_index is not None and page_index >= 0:
+                    entries.append((str(item.title), page_index + 1))
+
+    collect(reader.outline, 1)
+    entries.sort(key=lambda entry: entry[1])
+
+    total_pages = len(reader.pages)
+    ranges = []
+    for index, (title, first_page) in enumerate(entries):
+        last_page = entries[index + 1][1] - 1 if index + 1 < len(entries) else total_pages
+        ranges.append((f"{index + 1:02d} - {title}", f"{first_page}-{max(first_page, last_page)}"))
+    return ranges
+
+def split_pdf(input_pdf, ranges, output_dir, workers=4, lazy=False):
+    """
+    Write many page ranges of one PDF to separate files, parsing the source only once.
+
+    All outputs are built from the same PdfReader, so every source object is parsed a
+    single time no matter how many outputs use it (overlapping ranges are fine). Each
+    finished writer is handed to a thread pool to be written while the next one is built;
+    at most 2 * workers writers wait to be written at any time.
+
+    Args:
+        input_pdf: Path to the source PDF, or a PdfReader that is already open
+        ranges (list): (name, pages) pairs; pages is a page expression, PageSet or list (1-indexed)
+        output_dir (str): Folder for the output files (<name>.pdf; "<name> (2).pdf" and so on
+                          when several ranges end up with the same file name)
+        workers (int): Number of writer threads (default: 4)
+        lazy (bool): Open a path with LazyPdfReader, for big files (default: False)
+
+    Returns:
+        list: Paths of the written files, in the order of ranges
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    reader = open_reader(input_pdf, lazy)
+    try:
+        return _split_reader(reader, ranges, output_dir, workers)
+    finally:
+        _close_if_opened(reader, input_pdf)
+
+def _split_reader(reader, ranges, output_dir, workers):
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+
+    total_pages = len(reader.pages)
+    output_paths = []
+    used_names = set()
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for name, pages in ranges:
+            selection = as_page_set(pages, total_pages)
+            if not selection:
+                print(f"⚠️ '{name}': no pages in range, skipped")
+                continue
+
+            # Copying pages into the writer reads the shared reader, so it stays on this thread
+            writer, _ = pages_writer(reader, selection)
+
+            output_path = os.path.join(output_dir, _unique_filename(_safe_filename(name), used_names))
+            output_paths.append(output_path)
+            pending.append(executor.submit(_write_pdf, writer, output_path))
+            print(f"'{name}': pages {selection}")
+
+            # Keep memory bounded: wait for the oldest write before building more writers
+            if len(pending) >= 2 * max(1, workers):
+                print(f"✅ Saved: {pending.popleft().result()}")
+
+        while pending:
+            print(f"✅ Saved: {pending.popleft().result()}")
+
+    return output_paths
+
+def pages_writer(reader, pages):
+    """
+    Build a PdfWriter holding the selected pages of a reader, in page order.
+
+    The pages are cloned into the writer, so writing it does not touch the reader again.
+
+    Args:
+        reader: PdfReader of the source PDF
+        pages: Pages to keep (1-indexed): page expression, PageSet or list
+
+    Returns:
+        tuple: (PdfWriter, PageSet of the pages it holds)
+    """
+    from PyPDF2 import PdfWriter
+
+    selection = as_page_set(pages, len(reader.pages))
+    writer = PdfWriter()
+    for page_num in selection:
+        writer.add_page(reader.pages[page_num - 1])
+    return writer, selection
+
+def extract_pages(input_pdf, output_path, pages, lazy=False):
+    """
+    Save some pages of a PDF as a new file.
+
+    Args:
+        input_pdf: Path to the source PDF, or a PdfReader that is already open
+        output_path (str): Path of the new PDF
+        pages: Pages to keep (1-indexed): page expression like "487-528", PageSet or list
+        lazy (bool): Open a path with LazyPdfReader, for big files (default: False)
+
+    Returns:
+        PageSet: The pages written
+    """
+    reader = open_reader(input_pdf, lazy)
+    try:
+        writer, selection = pages_writer(reader, pages)
+    finally:
+        _close_if_opened(reader, input_pdf)
+    _write_pdf(writer, output_path)
+    return selection
+
+def remove_pages(input_pdf, output_path, pages, lazy=False):
+    """
+    Save a PDF without some of its pages.
+
+    Args:
+        input_pdf: Path to the source PDF, or a PdfReader that is already open
+        output_path (str): Path of the new PDF
+        pages: Pages to remove (1-indexed): page expression like "16-31,40-42", PageSet or list
+        lazy (bool): Open a path with LazyPdfReader, for big files (default: False)
+
+    Returns:
+        PageSet: The pages removed
+    """
+    reader = open_reader(input_pdf, lazy)
+    try:
+        total_pages = len(reader.pages)
+        removed = as_page_set(pages, total_pages)
+        writer, _ = pages_writer(reader, removed.complement(total_pages))
+    finally:
+        _close_if_opened(reader, input_pdf)
+    _write_pdf(writer, output_path)
+    return removed
+
+def cut_pages(input_path, output_path, pages, incremental=False):
+    """
+    Save a PDF without some of its pages by deleting them from the page tree.
+
+    Unlike remove_pages(), the kept pages are not copied one by one into a new document:
+    PyMuPDF unlinks the removed pages from the page tree (together with bookmarks and
+    links that point to them), so the work grows with the number of removed pages.
+
+    The result is saved either as one compacted save that leaves out every object no
+    longer used (fonts and images only the removed pages needed), or with incremental=True
+    as a copy of the input with the changed page-tree objects appended. The incremental
+    save is the fastest, but the file does not get smaller because the removed pages'
+    data stays in it. Files that cannot be updated incrementally (e.g. damaged ones MuPDF
+    had to repair) get a compacted save instead.
+
+    Args:
+        input_path (str): Path to the source PDF
+        output_path (str): Path of the new PDF (may be input_path to edit the file itself)
+        pages: Pages to remove (1-indexed): page expression like "16-31,40-42", PageSet or list
+        incremental (bool): Append the change to a copy of the input instead of compacting (default: False)
+
+    Returns:
+        PageSet: The pages removed
+    """
+    import shutil
+    import fitz
+
+    same_file = os.path.abspath(input_path) == os.path.abspath(output_path)
+    if incremental and not same_file:
+        shutil.copyfile(input_path, output_path)
+        input_path = output_path
+        same_file = True
+
+    doc = fitz.open(input_path)
+    try:
+        removed = as_page_set(pages, doc.page_count)
+        if removed:
+            doc.delete_pages([page_num - 1 for page_num in removed])
+
+        if incremental and doc.can_save_incrementally():
+            doc.saveIncr()
+            return removed
+        # A file that is open cannot be overwritten: save next to it, then replace it
+        save_path = output_path + ".tmp" if same_file else output_path
+        doc.save(save_path, garbage=1)
+    finally:
+        doc.close()
+    if same_file:
+        os.replace(save_path, output_path)
+    return removed
+
+def open_reader(input_pdf, lazy=False):
+    """
+    Open a source PDF for reading pages out of it.
+
+    Args:
+        input_pdf: Path to the PDF, or a PdfReader that is already open (returned as is)
+        lazy (bool): Use LazyPdfReader, which memory-maps the file and only reads the pages
+                     that are used, instead of loading the whole file (default: False)
+
+    Returns:
+        PdfReader (or LazyPdfReader)
+    """
+    from PyPDF2 import PdfReader
+
+    if isinstance(input_pdf, PdfReader):
+        return input_pdf
+    if lazy:
+        from lazy_reader import LazyPdfReader
+        return LazyPdfReader(input_pdf)
+    return PdfReader(input_pdf)
+
+def _close_if_opened(reader, input_pdf):
+    """Close a lazy reader that open_reader() opened from a path (the writer holds copies of the pages)."""
+    if reader is not input_pdf and hasattr(reader, "close"):
+        reader.close()
+
+def _write_pdf(writer, output_path):
+    with open(output_path, "wb") as output_file:
+        writer.write(output_file)
+    return output_path
+
+def _unique_filename(filename, used_names):
+    """Add " (2)", " (3)"... to a file name already used by this split (case-insensitive, as on Windows)."""
+    stem, extension = os.path.splitext(filename)
+    candidate = filename
+    number = 2
+    while candidate.lower() in used_names:
+        candidate = f"{stem} ({number}){extension}"
+        number += 1
+    used_names.add(candidate.lower())
+    return candidate
+
+def _safe_filename(name):
+    """Turn a range name (e.g. a bookmark title) into a valid .pdf file name."""
+    name = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', name).strip().rstrip('.') or "part"
+    if not name.lower().endswith('.pdf'):
+        name += '.pdf'
+    return name
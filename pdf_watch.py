@@ -0,0 +1,268 @@
+### Watch a scanner folder and merge the numbered PDFs (1.pdf, 2.pdf, ...) as soon as a merge is triggered ###
+
+import asyncio
+import os
+import time
+from pdf_finalize import finalize_pdf
+from pdf_names import merged_output_name, numbered_pdfs
+
+# 👉 Folder the scanner writes to
+folder_path = r'C:\Users\ajayb\OneDrive - Tribhuvan University\Desktop\pdf'
+
+# 👉 PDF filenames to leave out of the merge (same rule as "pdf metge 1-100.py")
+skip_list = [
+    # "2.pdf",
+]
+
+# 👉 When to merge (any of these):
+trigger_file = "MERGE"      # create an empty file with this name in the folder to merge now
+expected_files = None       # merge as soon as this many PDFs are there, e.g. 100
+idle_seconds = None         # merge when no new PDF arrived for this long, e.g. 120
+keep_watching = True        # False = stop after the first merge
+
+# 👉 A file counts as complete once its size has not changed for this long (scanners write slowly)
+settle_seconds = 2.0
+poll_interval = 1.0
+
+# 👉 Final save of each merged PDF: None (as written, fastest), "fast", "balanced" or "smallest"
+finalize_profile = None
+
+class FolderWatcher:
+    """
+    Keeps the numbered PDFs of a folder parsed and in order, ready to merge at any moment.
+
+    New or changed files are picked up by polling (or at once through inotify & co. when
+    the optional watchfiles package is installed). A file is parsed in a background thread
+    once its size and modification time have been stable for settle_seconds and it ends
+    with %%EOF, so files still being written are never read; a merge waits for them.
+
+    Parsing reads every object the pages use (contents, fonts, images...), so no file is
+    read or parsed after the trigger. The merge itself still copies those objects into a
+    new writer and writes the output, which takes time in proportion to the page count.
+
+    Args:
+        folder_path (str): Folder to watch
+        skip_list: File names to leave out
+        output_path (str): Merged PDF (default: "<first>-<last>.pdf" in the folder, decided at merge time)
+        trigger_file (str): Name of a file whose appearance triggers a merge; it is deleted afterwards (default: "MERGE")
+        expected_files (int): Merge once this many files are ready (default: None)
+        idle_seconds (float): Merge once no file arrived or changed for this long (default: None)
+        settle_seconds (float): How long a file must stay unchanged before it is parsed (default: 2.0)
+        poll_interval (float): Seconds between folder scans (default: 1.0)
+        finalize_profile (str): pdf_finalize profile applied to each merged PDF (default: None)
+    """
+
+    def __init__(self, folder_path, skip_list=(), output_path=None, trigger_file="MERGE", expected_files=None,
+                 idle_seconds=None, settle_seconds=2.0, poll_interval=1.0, finalize_profile=None):
+        self.folder_path = folder_path
+        self.skip_list = list(skip_list)
+        self.output_path = output_path
+        self.trigger_file = trigger_file
+        self.expected_files = expected_files
+        self.idle_seconds = idle_seconds
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.finalize_profile = finalize_profile
+
+        self.pending = {}   # name -> (signature, time the signature was first seen)
+        self.parsing = {}   # name -> asyncio task
+        self.ready = {}     # name -> (signature, PdfReader)
+        self.failed = {}    # name -> signature that could not be parsed
+        self.incomplete = set()
+        self.last_change = time.monotonic()
+        self.merged_signatures = None
+        self._changed = asyncio.Event()
+
+    async def run(self, once=False):
+        """
+        Watch until cancelled (or until the first merge with once=True).
+
+        Returns:
+            str: Path of the last merged PDF, or None
+        """
+        print(f"👀 Watching {self.folder_path} (trigger: {self._describe_triggers()})")
+        notifier = asyncio.create_task(self._notify_changes())
+        last_output = None
+        try:
+            while True:
+                self._scan()
+                if self._should_merge():
+                    if self.pending or self.parsing:
+                        # Some PDFs are still being written or parsed: merge as soon as they are ready
+                        await self._wait_for_change()
+                        continue
+                    last_output = await self.merge_now()
+                    if once:
+                        return last_output
+                await self._wait_for_change()
+        finally:
+            notifier.cancel()
+            for task in self.parsing.values():
+                task.cancel()
+
+    async def merge_now(self):
+        """
+        Merge the ready PDFs in numeric order.
+
+        Returns:
+            str: Path of the merged PDF, or None if there was nothing to merge
+        """
+        names = sorted(self.ready, key=lambda name: int(os.path.splitext(name)[0]))
+        trigger_path = os.path.join(self.folder_path, self.trigger_file) if self.trigger_file else None
+        if trigger_path and os.path.exists(trigger_path):
+            os.remove(trigger_path)
+        if not names:
+            print("No PDF files found to merge (or all skipped).")
+            return None
+
+        output_path = self.output_path or os.path.join(self.folder_path, merged_output_name(names))
+        readers = [self.ready[name][1] for name in names]
+        start = time.perf_counter()
+        page_count = await asyncio.to_thread(_write_merged, readers, output_path)
+        if self.finalize_profile:
+            await asyncio.to_thread(finalize_pdf, output_path, profile=self.finalize_profile)
+
+        self.merged_signatures = {name: self.ready[name][0] for name in names}
+        print(f"✅ Merged {len(names)} PDFs ({page_count} pages) in {time.perf_counter() - start:.2f}s: {output_path}")
+        return output_path
+
+    def _scan(self):
+        now = time.monotonic()
+        present = set()
+        for name in numbered_pdfs(self.folder_path, self.skip_list):
+            present.add(name)
+            try:
+                stat = os.stat(os.path.join(self.folder_path, name))
+            except OSError:
+                continue  # removed since the listing
+            signature = (stat.st_size, stat.st_mtime_ns)
+
+            if name in self.ready and self.ready[name][0] == signature:
+                continue
+            if name in self.parsing or self.failed.get(name) == signature:
+                continue
+
+            seen = self.pending.get(name)
+            if seen is None or seen[0] != signature:
+                # New or still growing: wait until it has been stable for settle_seconds
+                self.pending[name] = (signature, now)
+                self.ready.pop(name, None)
+                self.last_change = now
+            elif now - seen[1] >= self.settle_seconds:
+                del self.pending[name]
+                self.parsing[name] = asyncio.create_task(self._parse(name, signature))
+
+        for name in set(self.ready) - present:
+            del self.ready[name]
+            self.last_change = now
+        for name in set(self.pending) - present:
+            del self.pending[name]
+            self.incomplete.discard(name)
+
+    async def _parse(self, name, signature):
+        path = os.path.join(self.folder_path, name)
+        try:
+            reader = await asyncio.to_thread(_parse_complete_pdf, path)
+        except IncompletePdfError:
+            # Stalled upload or scanner pause: treat it as still being written, a merge waits for it
+            if name not in self.incomplete:
+                print(f"⏳ {name} is not complete yet, waiting for it (remove it or add it to skip_list to merge without it)")
+            self.incomplete.add(name)
+            self.pending[name] = (signature, time.monotonic())
+        except Exception as e:
+            # Keep it out until it changes again (e.g. the scanner rewrites it)
+            self.failed[name] = signature
+            print(f"⚠️ Could not read {name}: {e}")
+        else:
+            self.ready[name] = (signature, reader)
+            self.failed.pop(name, None)
+            self.incomplete.discard(name)
+            print(f"📄 {name}: {len(reader.pages)} pages ready ({len(self.ready)} PDFs ready)")
+        finally:
+            self.parsing.pop(name, None)
+            self._changed.set()
+
+    def _should_merge(self):
+        if self.trigger_file and os.path.exists(os.path.join(self.folder_path, self.trigger_file)):
+            return True
+        current = {name: entry[0] for name, entry in self.ready.items()}
+        if not current or current == self.merged_signatures:
+            return False
+        if self.expected_files and len(self.ready) + len(self.pending) + len(self.parsing) >= self.expected_files:
+            return True
+        return bool(self.idle_seconds) and time.monotonic() - self.last_change >= self.idle_seconds
+
+    async def _wait_for_change(self):
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._changed.clear()
+
+    async def _notify_changes(self):
+        """Wake the loop on file system events when watchfiles is installed; otherwise polling alone is used."""
+        try:
+            from watchfiles import awatch
+        except ImportError:
+            return
+        async for _ in awatch(self.folder_path):
+            self._changed.set()
+
+    def _describe_triggers(self):
+        triggers = []
+        if self.trigger_file:
+            triggers.append(f"create '{self.trigger_file}'")
+        if self.expected_files:
+            triggers.append(f"{self.expected_files} files")
+        if self.idle_seconds:
+            triggers.append(f"{self.idle_seconds:g}s without new files")
+        return ", ".join(triggers) or "none"
+
+class IncompletePdfError(ValueError):
+    """The file does not end with %%EOF yet."""
+
+def _parse_complete_pdf(path):
+    """Parse a PDF that has been fully written, with every object its pages use already read."""
+    with open(path, "rb") as f:
+        f.seek(max(0, os.path.getsize(path) - 1024))
+        if b"%%EOF" not in f.read():
+            raise IncompletePdfError(path)
+    from PyPDF2 import PdfReader
+    from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject
+
+    reader = PdfReader(path)
+    # Resolve the whole object graph of the pages now rather than at merge time (iteratively: deep trees)
+    seen = set()
+    stack = list(reader.pages)
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, IndirectObject):
+            if (obj.idnum, obj.generation) in seen:
+                continue
+            seen.add((obj.idnum, obj.generation))
+            obj = obj.get_object()
+        if isinstance(obj, DictionaryObject):
+            stack.extend(value for key, value in obj.items() if key != "/Parent")
+        elif isinstance(obj, ArrayObject):
+            stack.extend(obj)
+    return reader
+
+def _write_merged(readers, output_path):
+    from PyPDF2 import PdfWriter
+
+    writer = PdfWriter()
+    for reader in readers:
+        for page in reader.pages:
+            writer.add_page(page)
+    with open(output_path, "wb") as f:
+        writer.write(f)
+    return len(writer.pages)
+
+if __name__ == "__main__":
+    watcher = FolderWatcher(folder_path, skip_list, trigger_file=trigger_file, expected_files=expected_files,
+                            idle_seconds=idle_seconds, settle_seconds=settle_seconds, poll_interval=poll_interval,
+                            finalize_profile=finalize_profile)
+    try:
+        asyncio.run(watcher.run(once=not keep_watching))
+    except KeyboardInterrupt:
+        print("Stopped watching.")
@@ -1,55 +1,50 @@
-import os
-from PyPDF2 import PdfReader, PdfWriter
+from pdf_blank import BlankPageFilter
+from pdf_finalize import finalize_pdf
+from pdf_merge import merge_with_skips
 
 # 👉 Folder where PDFs are stored
 folder_path = r'C:\Users\ajayb\OneDrive - Tribhuvan University\Desktop\pdf'
 
-# 👉 Dictionary: PDF filename -> list of pages to skip (1-based)
+# 👉 Store fonts, images and other resources shared by the PDFs only once (smaller output).
+#    Set to True to use the streaming merge with deduplication; False copies the kept pages with PdfWriter.
+remove_duplicates = False
+
+# 👉 Also leave out blank pages (empty scanner sheets); checked in parallel while the merge runs
+skip_blank_pages = False
+blank_ink_ratio = 0.002  # pages with less ink than this share of the page count as blank
+blank_workers = None     # worker processes for the check (None = number of CPUs)
+
+# 👉 Final save: None (keep as written), "fast", "balanced" (smaller, lossless) or "smallest" (also recompresses large images as JPEG)
+finalize_profile = None
+linearize = False  # fast web view for the document server (needs pikepdf)
+
+# 👉 Dictionary: PDF filename -> pages to skip (1-based), as a list or a page expression
 pdf_skip_dict = {
     "1.pdf": [2, 7, 50],
     "2.pdf": [1, 25],
     "3.pdf": [],
     "4.pdf": [1, 2],  # Skipping first 2 pages
+    # "5.pdf": "1-2,-1",  # Skipping first 2 pages and the last page
 }
 
-# Filter existing files and track missing
-existing_dict = {k: v for k, v in pdf_skip_dict.items() if os.path.exists(os.path.join(folder_path, k))}
-missing_files = [k for k in pdf_skip_dict if k not in existing_dict]
-
-if missing_files:
-    print("⚠️ Missing files (skipped):")
-    for f in missing_files:
-        print(f" - {f}")
-
-if not existing_dict:
-    print("❌ No valid PDF files to process.")
-    exit()
-
-# Get first and last filenames for output name
-valid_keys = list(existing_dict.keys())
-first_name = os.path.splitext(valid_keys[0])[0]
-last_name = os.path.splitext(valid_keys[-1])[0]
-output_filename = f"{first_name}-{last_name}.pdf"
-output_path = os.path.join(folder_path, output_filename)
-
-# Prepare writer
-writer = PdfWriter()
-
-# Loop through each file and skip specified pages
-for pdf_name, skip_pages in existing_dict.items():
-    pdf_path = os.path.join(folder_path, pdf_name)
-    reader = PdfReader(pdf_path)
-    total_pages = len(reader.pages)
-    
-    # Convert 1-based skip list to 0-based index
-    skip_set = set([p - 1 for p in skip_pages if 1 <= p <= total_pages])
-
-    for i in range(total_pages):
-        if i not in skip_set:
-            writer.add_page(reader.pages[i])
-
-# Save final merged PDF
-with open(output_path, 'wb') as f:
-    writer.write(f)
-
-print(f"\n✅ Merged PDF saved as: {output_path}")
+# The blank page check starts worker processes, which re-import this script on Windows
+if __name__ == "__main__":
+    blank_filter = BlankPageFilter(ink_ratio=blank_ink_ratio, workers=blank_workers) if skip_blank_pages else None
+
+    # Merge into "<first>-<last>.pdf" using the first and last existing filenames
+    try:
+        output_path, missing_files = merge_with_skips(folder_path, pdf_skip_dict, dedup=remove_duplicates,
+                                                      blank_filter=blank_filter)
+    except ValueError:
+        print("❌ No valid PDF files to process.")
+        exit()
+
+    if missing_files:
+        print("⚠️ Missing files (skipped):")
+        for f in missing_files:
+            print(f" - {f}")
+
+    if finalize_profile:
+        finalize_pdf(output_path, profile=finalize_profile, linearize=linearize)
+
+    print(f"\n✅ Merged PDF saved as: {output_path}")
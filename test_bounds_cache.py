@@ -0,0 +1,31 @@
+### Bounds cache keys follow what a page draws, not its object numbers ###
+
+import fitz
+from bounds_cache import BoundsCache
+
+def _add_form_page(doc, form_name, drawing):
+    """Add a page whose only content draws a form XObject named form_name, with its own copies of every object."""
+    page = doc.new_page(width=200, height=200)
+    page_xref = page.xref
+    form_xref = doc.get_new_xref()
+    doc.update_object(form_xref, "<</Type/XObject/Subtype/Form/BBox[0 0 200 200]>>")
+    doc.update_stream(form_xref, drawing)
+    contents_xref = doc.get_new_xref()
+    doc.update_object(contents_xref, "<<>>")
+    doc.update_stream(contents_xref, f"q /{form_name} Do Q".encode())
+    doc.xref_set_key(page_xref, "Resources", f"<</XObject<</{form_name} {form_xref} 0 R>>>>")
+    doc.xref_set_key(page_xref, "Contents", f"{contents_xref} 0 R")
+
+def test_pages_differing_inside_a_resource_named_d_get_different_keys(tmp_path):
+    doc = fitz.open()
+    _add_form_page(doc, "D", b"0 0 50 50 re f")
+    _add_form_page(doc, "D", b"0 0 150 150 re f")
+    _add_form_page(doc, "D", b"0 0 50 50 re f")
+    small, large, small_again = doc[0], doc[1], doc[2]
+
+    cache = BoundsCache(str(tmp_path / "bounds.sqlite"))
+    try:
+        assert cache.page_key(small, 72, 200) != cache.page_key(large, 72, 200)
+        assert cache.page_key(small, 72, 200) == cache.page_key(small_again, 72, 200)
+    finally:
+        cache.close()
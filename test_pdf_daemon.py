@@ -0,0 +1,79 @@
+### The daemon sends what each job prints back to the client that sent it ###
+
+import os
+import socket
+import subprocess
+import sys
+import time
+import pytest
+from PyPDF2 import PdfWriter
+from pdf_daemon import send_request
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="the daemon needs Unix sockets")
+
+def _write_blank_pdf(path, page_count):
+    writer = PdfWriter()
+    for _ in range(page_count):
+        writer.add_blank_page(width=595, height=842)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+@pytest.fixture
+def daemon(tmp_path):
+    """A daemon in its own process, as it runs for real; yields (socket path, path of its console log)."""
+    socket_path = str(tmp_path / "daemon.sock")
+    console_path = tmp_path / "daemon.log"
+    with open(console_path, "w") as console:
+        process = subprocess.Popen([sys.executable, os.path.join(TOOLS_DIR, "pdf_daemon.py"), "start",
+                                    "--socket", socket_path], cwd=TOOLS_DIR, stdout=console, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.monotonic() + 60
+        while not os.path.exists(socket_path):
+            assert process.poll() is None and time.monotonic() < deadline, console_path.read_text()
+            time.sleep(0.05)
+        yield socket_path, console_path
+        send_request({"command": "stop"}, socket_path, timeout=10)
+        process.wait(10)
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+def test_manifest_jobs_print_to_their_client(tmp_path, daemon):
+    source = str(tmp_path / "book.pdf")
+    _write_blank_pdf(source, 6)
+    jobs = [
+        {"op": "split", "input": source, "output_dir": str(tmp_path / f"parts{index}"),
+         "ranges": {f"first{index}": "1-2", f"rest{index}": "3-"}}
+        for index in range(3)
+    ]
+    jobs.append({"op": "merge_list", "folder": str(tmp_path), "files": ["book.pdf", "missing.pdf"],
+                 "output": str(tmp_path / "merged.pdf")})
+
+    socket_path, console_path = daemon
+    response = send_request({"jobs": jobs, "workers": 4}, socket_path, timeout=60)
+
+    assert response["status"] == "ok"
+    assert all(result["status"] == "ok" for result in response["results"])
+    log = response["log"]
+    for index in range(3):
+        # Printed by split_pdf on the run_jobs pool threads
+        assert f"'first{index}': pages 1-2" in log
+        assert f"Saved: {tmp_path / f'parts{index}' / f'rest{index}.pdf'}" in log
+    assert "missing.pdf is missing and was skipped" in log
+    assert "4 of 4 jobs done" in log
+    assert "Saved:" not in console_path.read_text(encoding="utf-8")
+
+def test_single_job_prints_to_its_client(tmp_path, daemon):
+    source = str(tmp_path / "book.pdf")
+    _write_blank_pdf(source, 4)
+    job = {"op": "split", "input": source, "output_dir": str(tmp_path / "parts"), "ranges": {"a": "1", "b": "2-"}}
+
+    socket_path, console_path = daemon
+    response = send_request({"job": job}, socket_path, timeout=60)
+
+    assert response["status"] == "ok"
+    assert "'a': pages 1" in response["log"]
+    assert "'b': pages 2-4" in response["log"]
+    assert "pages" not in console_path.read_text(encoding="utf-8")